@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# MagicList/MagicStr取值的微基准：python benchmarks/bench_magic.py
+import timeit
+
+from my_utils.tools import MagicBase, MagicList, MagicStr
+
+
+def legacy_getitem(values, item):
+    """改动前的实现：每次取值都创建一个MagicBase"""
+    return MagicBase(list.__getitem__)(values, item)
+
+
+def main(number=1000000):
+    lst = MagicList(['a', 'b', 'c'])
+    text = MagicStr('python')
+    cases = [
+        ('MagicList[0] legacy', lambda: legacy_getitem(lst, 0)),
+        ('MagicList[0]', lambda: lst[0]),
+        ('MagicList[9] legacy', lambda: legacy_getitem(lst, 9)),
+        ('MagicList[9]', lambda: lst[9]),
+        ('MagicList.get(9)', lambda: lst.get(9, '')),
+        ('MagicStr[0] legacy', lambda: MagicBase(str.__getitem__)(text, 0)),
+        ('MagicStr[0]', lambda: text[0]),
+        ('MagicList.wrap(MagicList)', lambda: MagicList.wrap(lst)),
+        ('MagicList(MagicList)', lambda: MagicList(lst)),
+    ]
+    for name, func in cases:
+        cost = timeit.timeit(func, number=number) / number * 1e9
+        print('{:<28} {:>8.1f} ns'.format(name, cost))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 from .libs import *
 from .loader import *
+from .parallel import *
+from .profiler import *
 from .temp import *
-from .useragent import random_ua
+from .useragent import UARotator, parse_ua, random_ua, ua_rotator
@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
 import base64
+import codecs
+import io
 import os
 import random
+import re
 import string
+from collections import namedtuple
+from urllib.parse import quote_plus, unquote_plus
 
 from .logger import line_logger
 
 __all__ = [
     'random_password', 'get_dir_path', 'header_to_dict', 'cookie_to_dict',
-    'form_encode', 'form_decode', 'base64_decode'
+    'form_encode', 'FormTemplate', 'form_decode', 'base64_decode', 'HttpRequest', 'parse_raw_request', 'iter_requests',
 ]
 
 logger = line_logger(__name__)
@@ -67,11 +72,9 @@ def header_to_dict(values, default=None):
     """
     if not isinstance(values, str):
         return default
-    headers = {}
-    for i in values.split('\n'):
-        if i.strip():
-            kv = i.split(':', 1)
-            headers.update({kv[0].strip(): kv[-1].strip()})
+    headers, names = {}, {}
+    for line in values.splitlines():
+        _add_header(headers, line, names)
     return headers
 
 
@@ -85,23 +88,28 @@ def cookie_to_dict(values, default=None):
     if not isinstance(values, str):
         return default
     cookies = {}
-    for i in values.split(';'):
-        if i.strip():
-            kv = i.split('=', 1)
-            if '|' in kv[-1]:
-                cookies.update({kv[0].strip(): {j.split('=', 1)[0].strip(): j.split('=', 1)[-1].strip() for j in
-                                                kv[-1].split('|')}})
-            else:
-                cookies.update({kv[0].strip(): kv[-1].strip()})
+    for item in values.split(';'):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if not key:
+            continue
+        if '|' in value:
+            sub = {}
+            for pair in value.split('|'):
+                k, _, v = pair.partition('=')
+                sub[k.strip()] = (v if _ else k).strip()
+            cookies[key] = sub
+        else:
+            cookies[key] = value.strip() if _ else key
     return cookies
 
 
 def form_encode(values, sort=True):
-    """dict转用&拼接的参数
+    """dict转用&拼接的参数，做百分号编码，列表值展开成重复的key
 
-    >>> data = {'name': 'miles', 'age': 1}
-    >>> form_encode(data)
-    'name=miles&age=1'
+    >>> data = {'name': 'miles', 'age': 1, 'q': '你好 x', 'tag': ['a', 'b']}
+    >>> form_encode(data, sort=False)
+    'name=miles&age=1&q=%E4%BD%A0%E5%A5%BD+x&tag=a&tag=b'
     """
     if not isinstance(values, dict):
         return None
@@ -112,23 +120,277 @@ def form_encode(values, sort=True):
     except Exception as e:
         logger.warning('{}: {}'.format(values, e))
     else:
-        result = '&'.join('{}={}'.format(k, values[k]) for k in keys)
+        result = '&'.join(_encode_pair(_quote(k) + '=', values[k]) for k in keys)
         return result
 
 
+_SAFE_TYPES = (int, float)
+
+
+def _quote(value):
+    if type(value) in _SAFE_TYPES:
+        return str(value)
+    return quote_plus(value if isinstance(value, (str, bytes)) else str(value))
+
+
+def _encode_pair(prefix, value, quote=_quote):
+    """prefix为已编码的'key='，列表值展开成重复的key"""
+    if isinstance(value, (list, tuple)):
+        return '&'.join(prefix + quote(v) for v in value)
+    return prefix + quote(value)
+
+
+class FormTemplate(object):
+    """参数模板，静态部分只编码一次，每次只填充变化的slot
+
+    values: 全部参数，slot对应的值作为默认值，None表示必须传入
+    slots: 会变化的key
+    prefix: 拼在最前面的字符串，比如'https://example.com/search?'
+    cache_size: 已编码值的缓存数量，超过后清空
+
+    >>> template = FormTemplate({'kw': '工程师', 'city': '北京', 'page': None}, slots=['page'],
+                                prefix='https://example.com/search?')
+    >>> template(page=2)
+    'https://example.com/search?city=%E5%8C%97%E4%BA%AC&kw=%E5%B7%A5%E7%A8%8B%E5%B8%88&page=2'
+    >>> template(page=[2, 3])
+    'https://example.com/search?city=%E5%8C%97%E4%BA%AC&kw=%E5%B7%A5%E7%A8%8B%E5%B8%88&page=2&page=3'
+    """
+
+    def __init__(self, values, slots=(), sort=True, prefix='', cache_size=4096):
+        keys = list(values.keys())
+        if sort:
+            keys.sort()
+        slots = set(slots)
+        unknown = slots.difference(keys)
+        if unknown:
+            keys.extend(sorted(unknown))
+
+        self.slots = []
+        self.defaults = {}
+        self.cache_size = cache_size
+        self._cache = {}
+        self._keys = {}
+        items = []
+        for key in keys:
+            if key in slots:
+                self.slots.append(key)
+                self.defaults[key] = values.get(key)
+                self._keys[key] = _quote(key) + '='
+                # 编码结果中不会出现\x00，用它标记slot的位置
+                items.append(self._keys[key] + '\x00')
+            else:
+                item = _encode_pair(_quote(key) + '=', values[key])
+                if item:
+                    items.append(item)
+        # _parts[i]是第i个slot前的静态部分，最后一个是尾部
+        self._parts = (prefix + '&'.join(items)).split('\x00')
+
+    def _encode(self, value):
+        if type(value) in _SAFE_TYPES:
+            return str(value)
+        try:
+            return self._cache[value]
+        except KeyError:
+            encoded = _quote(value)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[value] = encoded
+            return encoded
+        except TypeError:
+            return _quote(value)
+
+    def __call__(self, **kwargs):
+        parts = self._parts
+        out = [parts[0]]
+        for i, key in enumerate(self.slots, 1):
+            value = kwargs.get(key, self.defaults[key])
+            if value is None:
+                logger.warning('{}: missing slot {}'.format(self.slots, key))
+                return None
+            if isinstance(value, (list, tuple)):
+                out.append(('&' + self._keys[key]).join([self._encode(v) for v in value]))
+            else:
+                out.append(self._encode(value))
+            out.append(parts[i])
+        return ''.join(out)
+
+
 def form_decode(values, default=None):
-    """用&拼接的参数转换成dict
+    """用&拼接的参数转换成dict，做百分号解码，重复的key合并成列表
 
-    >>> data = 'name=miles&age=1'
+    >>> data = 'name=miles&age=1&tag=a&tag=b&q=%E4%BD%A0%E5%A5%BD+x'
     >>> form_decode(data)
-    data = {'name': 'miles', 'age': 1}
+    {'name': 'miles', 'age': '1', 'tag': ['a', 'b'], 'q': '你好 x'}
     """
     if not isinstance(values, str):
         return default
 
-    try:
-        result = {item.split('=')[0]: item.split('=')[1] for item in values.split('&') if item}
-    except Exception as e:
-        logger.warning(e)
+    result = {}
+    for item in values.split('&'):
+        if not item:
+            continue
+        key, _, value = item.partition('=')
+        key, value = _unquote(key), _unquote(value)
+        if key in result:
+            old = result[key]
+            if isinstance(old, list):
+                old.append(value)
+            else:
+                result[key] = [old, value]
+        else:
+            result[key] = value
+    return result
+
+
+def _unquote(value):
+    if '%' in value or '+' in value:
+        return unquote_plus(value)
+    return value
+
+
+def _add_header(headers, line, names, pseudo=None):
+    """解析一行header，重复的key按HTTP规范用逗号合并（Cookie用分号）
+
+    传入pseudo时，HTTP/2伪首部（:method、:authority等）放进pseudo而不是headers，
+    否则requests等库发送时会报InvalidHeader
+    """
+    line = line.strip()
+    if not line:
+        return
+    # HTTP/2伪首部，比如 :authority: www.example.com
+    start = 1 if line[0] == ':' else 0
+    index = line.find(':', start)
+    if index < 0:
+        key = value = line
     else:
-        return result
+        key, value = line[:index].strip(), line[index + 1:].strip()
+    if pseudo is not None and key.startswith(':'):
+        pseudo[key.lower()] = value
+        return
+    # names: 小写key -> headers中的key，按小写合并，保留第一次出现时的写法
+    lower = key.lower()
+    name = names.get(lower)
+    if name is None:
+        names[lower] = key
+        headers[key] = value
+    else:
+        sep = '; ' if lower == 'cookie' else ', '
+        headers[name] = headers[name] + sep + value
+
+
+HttpRequest = namedtuple('HttpRequest', ['method', 'url', 'headers', 'cookies', 'form', 'body'])
+
+_RE_REQUEST_LINE = re.compile(r'^([A-Z]+) (\S+) HTTP/[\d.]+\s*$')
+
+
+def _get_header(headers, name):
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _build_request(method, target, headers, pseudo, body, scheme='https'):
+    if target.startswith(('http://', 'https://')):
+        url = target
+    else:
+        host = _get_header(headers, 'host') or pseudo.get(':authority', '')
+        url = '{}://{}{}'.format(pseudo.get(':scheme') or scheme, host, target)
+    cookie = _get_header(headers, 'cookie')
+    content_type = _get_header(headers, 'content-type') or ''
+    form = form_decode(body) if body and 'x-www-form-urlencoded' in content_type else {}
+    return HttpRequest(method, url, headers, cookie_to_dict(cookie, {}), form, body)
+
+
+def parse_raw_request(values, scheme='https', default=None):
+    """解析一个原始HTTP请求文本
+
+    >>> raw = '''POST /login HTTP/1.1
+    Host: www.example.com
+    Content-Type: application/x-www-form-urlencoded
+    Cookie: a=1; b=2
+
+    name=miles&age=1'''
+    >>> parse_raw_request(raw)
+    HttpRequest(method='POST', url='https://www.example.com/login', headers={...},
+                cookies={'a': '1', 'b': '2'}, form={'name': 'miles', 'age': '1'}, body='name=miles&age=1')
+    """
+    if not isinstance(values, str):
+        return default
+    for request in _iter_raw(io.StringIO(values.strip() + '\n'), scheme):
+        return request
+    return default
+
+
+def _iter_raw(lines, scheme):
+    """逐行读取，遇到新的请求行时结束上一个请求"""
+    method = target = None
+    headers, names, pseudo, body = {}, {}, {}, []
+    in_body = False
+    for line in lines:
+        line = line.rstrip('\r\n')
+        m = _RE_REQUEST_LINE.match(line.strip()) if (in_body or method is None) else None
+        if m:
+            if method is not None:
+                yield _build_request(method, target, headers, pseudo, '\n'.join(body).strip(), scheme)
+            method, target = m.groups()
+            headers, names, pseudo, body = {}, {}, {}, []
+            in_body = False
+        elif method is None:
+            continue
+        elif in_body:
+            body.append(line)
+        elif not line.strip():
+            in_body = True
+        else:
+            _add_header(headers, line, names, pseudo)
+    if method is not None:
+        yield _build_request(method, target, headers, pseudo, '\n'.join(body).strip(), scheme)
+
+
+def _iter_har(fp):
+    from .loader import JmesLoader
+
+    for entry in JmesLoader.iterload(fp, 'log.entries'):
+        request = entry.getall().get('request') or {}
+        # url直接取request.url，伪首部只需要从headers中剔除
+        headers, names = {}, {}
+        for item in request.get('headers') or []:
+            _add_header(headers, '{}: {}'.format(item.get('name', ''), item.get('value', '')), names, {})
+        cookies = {item.get('name'): item.get('value') for item in request.get('cookies') or []}
+        post = request.get('postData') or {}
+        body = post.get('text') or ''
+        if post.get('params'):
+            form = {}
+            for item in post['params']:
+                form.setdefault(_unquote(item.get('name', '')), []).append(_unquote(item.get('value') or ''))
+            form = {k: v[0] if len(v) == 1 else v for k, v in form.items()}
+        elif 'x-www-form-urlencoded' in (post.get('mimeType') or ''):
+            form = form_decode(body, {})
+        else:
+            form = {}
+        yield HttpRequest(request.get('method'), request.get('url'), headers, cookies, form, body)
+
+
+def iter_requests(source, scheme='https'):
+    """流式读取HAR文件或原始请求转储文件，逐个返回HttpRequest，不会一次载入整个文件
+
+    source: 文件路径或以二进制方式打开的文件对象；原始请求转储中多个请求直接首尾相接
+    scheme: 原始请求中只有路径时使用的协议
+
+    >>> for request in iter_requests('capture.har'):
+            requests.request(request.method, request.url, headers=request.headers, data=request.form or None)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fp:
+            yield from iter_requests(fp, scheme)
+        return
+
+    fp = source if hasattr(source, 'peek') else io.BufferedReader(source)
+    if fp.peek(3)[:3] == codecs.BOM_UTF8:
+        fp.read(3)
+    head = fp.peek(64).lstrip()
+    if head.startswith(b'{'):
+        yield from _iter_har(fp)
+    else:
+        yield from _iter_raw(io.TextIOWrapper(fp, encoding='utf-8', errors='replace', newline=''), scheme)
@@ -1,38 +1,422 @@
 # -*- coding: utf-8 -*-
+import codecs
+import copy
+import itertools
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
 from jmespath import compile
-from parsel.selector import Selector, SelectorList
-from parsel.utils import flatten
+from lxml import etree
+from parsel.csstranslator import GenericTranslator, HTMLTranslator
+from parsel.selector import Selector, SelectorList, _ctgroup
+
+from .profiler import proc_name, profiler
+from .tools import Identity, MagicList, MagicStr, TakeFirst, _flatten_into
+
+__all__ = ['ItemLoader', 'JmesLoader', 'ComposeLoader', 'JmesCache', 'jmes_cache', 'QueryCache', 'query_cache', 'Pipeline',
+           'Field']
+
+
+class CompileCache(object):
+    """编译结果的LRU缓存，线程安全，子类实现_compile"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _compile(self, key):
+        raise NotImplementedError
+
+    def get(self, key):
+        with self._lock:
+            expr = self._data.get(key)
+            if expr is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return expr
+            self.misses += 1
+
+        # 编译放在锁外，语法错误直接抛出，不进入缓存
+        expr = self._compile(key)
+        with self._lock:
+            self._data[key] = expr
+            self._data.move_to_end(key)
+            while len(self._data) > max(self.maxsize, 0):
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return expr
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class JmesCache(CompileCache):
+    """jmespath表达式编译结果的LRU缓存
+
+    >>> cache = JmesCache(maxsize=2)
+    >>> cache.get('people[].first').search(src_data)
+    >>> cache.stats()
+    {'hits': 0, 'misses': 1, 'evictions': 0, 'size': 1, 'maxsize': 2}
+    """
 
-from .tools import Identity, MagicList, MagicStr, TakeFirst
+    def _compile(self, query):
+        return compile(query)
 
-__all__ = ['ItemLoader', 'JmesLoader', 'ComposeLoader']
 
+class XPathCache(CompileCache):
+    """lxml XPath对象缓存，key为(查询, 命名空间, smart_strings)"""
 
-class CustomSelectorList(SelectorList):
-    @staticmethod
-    def _save_mode(values):
-        if isinstance(values, str):
-            return MagicStr(values)
-        elif isinstance(values, list):
-            return MagicList(values)
-        else:
-            return values
+    def _compile(self, key):
+        query, namespaces, smart_strings = key
+        return etree.XPath(query, namespaces=dict(namespaces), smart_strings=smart_strings)
+
+    def compile(self, query, namespaces=None, smart_strings=False):
+        namespaces = tuple(namespaces.items()) if namespaces else ()
+        return self.get((query, namespaces, smart_strings))
+
+
+class CssCache(CompileCache):
+    """css转xpath结果缓存，key为(文档类型, css)"""
+
+    def _compile(self, key):
+        st, query = key
+        return _ctgroup[st]['_csstranslator'].css_to_xpath(query)
+
+    def translate(self, st, query):
+        return self.get((st, query))
+
+
+class QueryCache(object):
+    """ItemLoader的xpath/css预编译缓存，同一模板的页面共用
+
+    >>> ItemLoader.query_cache.stats()
+    {'xpath': {'hits': 9980, 'misses': 20, ...}, 'css': {'hits': 499, 'misses': 1, ...}}
+    """
+
+    def __init__(self, maxsize=512):
+        self.xpath = XPathCache(maxsize)
+        self.css = CssCache(maxsize)
+
+    def clear(self):
+        self.xpath.clear()
+        self.css.clear()
 
-    def _get_value(self, values, *processors, op=None):
-        values = self._save_mode(values)
-        for proc in processors:
+    def stats(self):
+        return {'xpath': self.xpath.stats(), 'css': self.css.stats()}
+
+
+jmes_cache = JmesCache()
+query_cache = QueryCache()
+
+
+def _save_mode(values):
+    if isinstance(values, str):
+        return MagicStr.wrap(values)
+    elif isinstance(values, list):
+        return MagicList.wrap(values)
+    else:
+        return values
+
+
+# proc()未传op时的标记，用于区分显式传入的op=None
+_OP_UNSET = object()
+
+
+class Pipeline(object):
+    """预编译的处理链，构建一次，可在所有loader的proc中重复使用
+
+    >>> pipe = Pipeline(ReFind(r'\d+'), ToInt(), op=TakeFirst())
+    >>> for tr in loader.css('.standard-table tbody tr'):
+            print(tr.xpath('./td[1]//text()').proc(pipe))    # 使用pipe自身的op
+            print(tr.xpath('./td[1]//text()').proc(pipe, op=Join()))    # 显式传入的op优先
+    >>> ComposeLoader(['a1', 'b2']).proc(pipe)
+    1
+    >>> pipe(['a1', 'b2'])
+    1
+
+    name为profiler中的字段名，默认由处理器名拼接；proc(..., field='salary')可为单次调用指定字段名，
+    使用相同处理链的不同字段在profiler中分开统计
+    """
+
+    def __init__(self, *processors, op=TakeFirst(), name=None):
+        self.processors = tuple(processors)
+        self.op = Identity() if op is None else op
+        self.name = name or '>'.join(proc_name(p) for p in self.processors) or '<none>'
+        # 所有处理器都实现了batch时整列处理
+        self.batched = bool(self.processors) and all(callable(getattr(p, 'batch', None)) for p in self.processors)
+
+    @classmethod
+    def build(cls, processors, op=_OP_UNSET):
+        """proc参数转Pipeline，只传入一个Pipeline时直接复用，显式传入op时替换它的op
+
+        未传op时默认TakeFirst()；Pipeline不能和其他处理器一起传入
+        """
+        if any(isinstance(p, cls) for p in processors):
+            if len(processors) > 1:
+                raise TypeError('Pipeline must be the only processor passed to proc()')
+            pipe = processors[0]
+            if op is _OP_UNSET:
+                return pipe
+            return cls(*pipe.processors, op=op, name=pipe.name)
+        return cls(*processors, op=TakeFirst() if op is _OP_UNSET else op)
+
+    def each(self, values, field=None):
+        """处理器作用于列表中的每个非空元素，结果展开（CustomSelectorList/JmesList/ComposeLoader）"""
+        if profiler.enabled:
+            return self._each_profiled(values, field or self.name)
+        if self.batched:
+            return self._each_batch(values)
+        for proc in self.processors:
             if values is None:
                 break
+            out = MagicList()
             try:
-                values = flatten(proc(value) for value in values if value)
+                for value in values:
+                    if value:
+                        _flatten_into(out, proc(value))
             except Exception as e:
                 break
-        values = op(values)
-        return self._save_mode(values)
+            values = out
+        return _save_mode(self.op(_save_mode(values)))
+
+    def _each_batch(self, values):
+        for proc in self.processors:
+            if values is None:
+                break
+            try:
+                values = proc.batch([value for value in values if value])
+            except Exception as e:
+                break
+        return _save_mode(self.op(_save_mode(values)))
+
+    def _each_profiled(self, values, field):
+        start = time.perf_counter()
+        exited = False
+        for proc in self.processors:
+            if values is None:
+                profiler.record_exit(field, proc)
+                exited = True
+                break
+            # 出错时values保持原样，与未开启profiler时的结果一致
+            items = [value for value in values if value]
+            begin = time.perf_counter()
+            try:
+                if self.batched:
+                    out = proc.batch(items)
+                else:
+                    out = MagicList()
+                    for value in items:
+                        _flatten_into(out, proc(value))
+            except Exception as e:
+                profiler.record(field, proc, len(items), time.perf_counter() - begin, e)
+                exited = True
+                break
+            profiler.record(field, proc, len(items), time.perf_counter() - begin)
+            values = out
+        result = _save_mode(self.op(_save_mode(values)))
+        profiler.record_field(field, time.perf_counter() - start, exited)
+        return result
+
+    def whole(self, values, field=None):
+        """处理器作用于整个列表（ItemLoader）"""
+        if profiler.enabled:
+            return self._whole_profiled(values, field or self.name)
+        values = _save_mode(values)
+        for proc in self.processors:
+            if values is None:
+                break
+            try:
+                values = proc(values)
+            except Exception as e:
+                break
+        return _save_mode(self.op(values))
+
+    def _whole_profiled(self, values, field):
+        start = time.perf_counter()
+        exited = False
+        values = _save_mode(values)
+        for proc in self.processors:
+            if values is None:
+                profiler.record_exit(field, proc)
+                exited = True
+                break
+            begin = time.perf_counter()
+            try:
+                values = proc(values)
+            except Exception as e:
+                profiler.record(field, proc, 1, time.perf_counter() - begin, e)
+                exited = True
+                break
+            profiler.record(field, proc, 1, time.perf_counter() - begin)
+        result = _save_mode(self.op(values))
+        profiler.record_field(field, time.perf_counter() - start, exited)
+        return result
+
+    __call__ = each
+
+    def __repr__(self):
+        return '<%s processors=%r op=%r>' % (type(self).__name__, self.processors, self.op)
 
-    def proc(self, *processors, op=TakeFirst()):
-        op = Identity() if op is None else op
-        return self._get_value(self.getall(), *processors, op=op)
+
+class Field(object):
+    """ItemLoader.extract的字段定义，查询相对于行元素
+
+    >>> Field('./td[1]//text()', ReFind(r'\S+'), op=Join())
+    >>> Field('td:nth-child(2)::text', Strip(), css=True)
+    """
+
+    def __init__(self, query, *processors, op=TakeFirst(), css=False):
+        self.query = query
+        self.css = css
+        self.pipeline = Pipeline(*processors, op=op)
+
+    def __repr__(self):
+        return '<%s query=%r css=%r>' % (type(self).__name__, self.query, self.css)
+
+
+# 以函数调用开头的查询（count(...)、string(...)等）不能拼接到行查询后面
+_RE_FUNC_QUERY = re.compile(r'^\s*(?!text\(|node\(|comment\(|processing-instruction\()[\w\-]+\s*\(')
+
+
+def _node_text(node, method):
+    """与parsel Selector.get一致的取值方式"""
+    if isinstance(node, etree._Element):
+        return etree.tostring(node, method=method, encoding='unicode', with_tail=False)
+    elif node is True:
+        return '1'
+    elif node is False:
+        return '0'
+    return str(node)
+
+
+_RE_AXIS = re.compile(r'([\w-]+)\s*::')
+_RE_PREDICATE = re.compile(r'\[[^\[\]]*\]')
+_ROW_AXES = {'child', 'descendant', 'descendant-or-self', 'attribute', 'self'}
+
+
+def _join_query(row_xpath, query):
+    """行查询与字段查询拼接成一个查询，无法安全拼接时返回None"""
+    query = query.strip()
+    if not query or query.startswith(('/', '(')) or '|' in query or '..' in query:
+        return None
+    if _RE_FUNC_QUERY.match(query):
+        return None
+    # 结果按最近的行祖先分回各行，只能拼接不离开行的轴；谓词内的轴不影响结果所在的位置
+    steps, n = query, 1
+    while n:
+        steps, n = _RE_PREDICATE.subn('', steps)
+    if any(axis not in _ROW_AXES for axis in _RE_AXIS.findall(steps)):
+        return None
+    if query == '.':
+        return '({})'.format(row_xpath)
+    if query.startswith('./'):
+        query = query[2:]
+    elif query.startswith('.'):
+        return None
+    return '({})/{}'.format(row_xpath, query)
+
+
+def _batch_values(cache, root, row_xpath, rows, query, namespaces, method):
+    """对所有行只执行一次字段查询，按祖先元素把结果分回各行
+
+    返回每行的字符串列表，无法分配时返回None
+    """
+    joined = _join_query(row_xpath, query) if row_xpath else None
+    if joined is None:
+        return None
+    try:
+        result = cache.xpath.compile(joined, namespaces, True)(root)
+    except etree.XPathError:
+        return None
+    if not isinstance(result, list):
+        return None
+
+    index = {row: i for i, row in enumerate(rows)}
+    values = [[] for _ in rows]
+    for node in result:
+        if isinstance(node, etree._Element):
+            owner = node
+        else:
+            getparent = getattr(node, 'getparent', None)
+            owner = getparent() if getparent else None
+        while owner is not None and owner not in index:
+            owner = owner.getparent()
+        if owner is None:
+            return None
+        values[index[owner]].append(_node_text(node, method))
+    return values
+
+
+def _iter_raw_chunks(source, chunk_size):
+    """bytes/str、类文件对象或块的可迭代对象统一转成块迭代，块保持原类型"""
+    if isinstance(source, (str, bytes, bytearray)):
+        for i in range(0, len(source), chunk_size):
+            yield source[i:i + chunk_size]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        yield from source
+
+
+def _iter_chunks(source, chunk_size):
+    """同_iter_raw_chunks，str块编码成utf8"""
+    for chunk in _iter_raw_chunks(source, chunk_size):
+        yield chunk.encode('utf8') if isinstance(chunk, str) else chunk
+
+
+def _row_values(cache, rows, query, namespaces, method):
+    """逐行执行预编译的字段查询"""
+    xpath = cache.xpath.compile(query, namespaces)
+    values = []
+    for row in rows:
+        result = xpath(row)
+        if not isinstance(result, list):
+            result = [result]
+        values.append([_node_text(node, method) for node in result])
+    return values
+
+
+class CustomSelectorList(SelectorList):
+    _save_mode = staticmethod(_save_mode)
+
+    def _get_value(self, values, *processors, op=_OP_UNSET, field=None):
+        return Pipeline.build(processors, op).each(values, field)
+
+    def proc(self, *processors, op=_OP_UNSET, field=None):
+        return self._get_value(self.getall(), *processors, op=op, field=field)
 
 
 class ItemLoader(Selector):
@@ -47,68 +431,332 @@ class ItemLoader(Selector):
             print(tr.xpath('./td[4]//text()').getall()
     """
     selectorlist_cls = CustomSelectorList
-
-    @staticmethod
-    def _save_mode(values):
-        if isinstance(values, str):
-            return MagicStr(values)
-        elif isinstance(values, list):
-            return MagicList(values)
+    query_cache = query_cache
+
+    _save_mode = staticmethod(_save_mode)
+
+    def _get_value(self, values, *processors, op=_OP_UNSET, field=None):
+        return Pipeline.build(processors, op).whole(values, field)
+
+    def proc(self, *processors, op=_OP_UNSET, field=None):
+        return self._get_value(self.getall(), *processors, op=op, field=field)
+
+    @classmethod
+    def iterparse(cls, source, tag, css=None, xpath=None, type='html', encoding=None, chunk_size=65536):
+        """流式解析，每解析完一个行元素就返回该行的ItemLoader，已返回的元素随即释放
+
+        source: bytes/str、类文件对象（如 r.raw）或bytes/str块的可迭代对象（如 r.iter_content()），
+                str按utf8输入解析器，此时忽略encoding
+        tag: 行元素标签名
+        css: 行元素自身需满足的css，只支持单个复合选择器，比如 'tr.item'
+        xpath: 以行元素为上下文的过滤条件，比如 'ancestor::table[@id="list"]'
+
+        type='xml'时内存只与单行大小有关；type='html'时已解析的元素同样会释放，
+        但libxml2的HTML推送解析器会保留全部已输入的原始数据，内存随文档大小线性增长（约等于文档字节数）
+
+        >>> r = requests.get(url, stream=True)
+        >>> for tr in ItemLoader.iterparse(r.iter_content(65536), 'tr', xpath='ancestor::tbody'):
+                print(tr.xpath('./td[1]//text()').proc(ReFind(r'\S+')))
+        >>> [tr.xpath('./td/text()').get() for tr in ItemLoader.iterparse('<table><tr><td>你好</td></tr></table>', 'tr')]
+        ['你好']
+        """
+        chunks = _iter_raw_chunks(source, chunk_size)
+        first = next(chunks, b'')
+        # str由这里编码成utf8，不能让解析器按默认编码（HTML为latin-1）解码
+        if isinstance(first, str):
+            encoding = 'utf-8'
+        chunks = itertools.chain([first], chunks)
+
+        if type == 'xml':
+            parser = etree.XMLPullParser(events=('end',), tag=tag, encoding=encoding, recover=True)
+            translator = GenericTranslator()
         else:
-            return values
-
-    def _get_value(self, values, *processors, op=None):
-        values = self._save_mode(values)
-        for proc in processors:
+            parser = etree.HTMLPullParser(events=('end',), tag=tag, encoding=encoding)
+            translator = HTMLTranslator()
+
+        tests = []
+        if css:
+            css_xpath = translator.css_to_xpath(css, prefix='self::')
+            if '/' in css_xpath:
+                raise ValueError('css "{}" must be a single compound selector'.format(css))
+            tests.append(etree.XPath('boolean({})'.format(css_xpath)))
+        if xpath:
+            tests.append(etree.XPath('boolean({})'.format(xpath)))
+
+        def read_rows():
+            for _, elem in parser.read_events():
+                if all(test(elem) for test in tests):
+                    row = copy.deepcopy(elem)
+                    row.tail = None
+                    yield cls(root=row, type=type)
+                # 嵌套在同名行元素里的不释放，由外层行释放
+                if not any(a.tag == elem.tag for a in elem.iterancestors()):
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf8')
+            if chunk:
+                parser.feed(chunk)
+            yield from read_rows()
+        parser.close()
+        yield from read_rows()
+
+    def _css2xpath(self, query):
+        return self.query_cache.css.translate(self.type, query)
+
+    def xpath(self, query, namespaces=None, **kwargs):
+        """与parsel Selector.xpath一致，查询编译结果从query_cache中取"""
+        if not hasattr(self.root, 'xpath'):
+            return self.selectorlist_cls([])
+
+        nsp = self.namespaces
+        if namespaces is not None:
+            nsp = dict(nsp)
+            nsp.update(namespaces)
+        try:
+            xpathev = self.query_cache.xpath.compile(query, nsp, self._lxml_smart_strings)
+            result = xpathev(self.root, **kwargs)
+        except etree.XPathError as e:
+            raise ValueError('XPath error: {} in {}'.format(e, query))
+
+        if type(result) is not list:
+            result = [result]
+        result = [self.__class__(root=x, _expr=query, namespaces=self.namespaces, type=self.type) for x in result]
+        return self.selectorlist_cls(result)
+
+    def _row_elements(self, query):
+        try:
+            result = self.query_cache.xpath.compile(query, self.namespaces)(self.root)
+        except etree.XPathError as e:
+            raise ValueError('XPath error: {} in {}'.format(e, query))
+        if not isinstance(result, list):
+            return []
+        return [x for x in result if isinstance(x, etree._Element)]
+
+    def extract(self, rows, spec, css=True, columns=False):
+        """按字段定义批量抽取所有行，每个字段的查询对全部行只执行一次
+
+        rows: 行查询（默认css，css=False时为xpath），或已选出的SelectorList
+        spec: {字段名: Field}
+
+        >>> spec = {
+                'name': Field('./td[1]//text()', ReFind(r'\S+')),
+                'salary': Field('./td[2]//text()', ToFloat()),
+                'tags': Field('td.tags a::text', css=True, op=None),
+            }
+        >>> loader.extract('.standard-table tbody tr', spec)
+        [{'name': 'a', 'salary': 1.0, 'tags': ['x', 'y']}, ...]
+        >>> loader.extract('.standard-table tbody tr', spec, columns=True)
+        {'name': ['a', ...], 'salary': [1.0, ...], 'tags': [['x', 'y'], ...]}
+        """
+        if isinstance(rows, str):
+            row_xpath = self._css2xpath(rows) if css else rows
+            elements = self._row_elements(row_xpath)
+        else:
+            row_xpath = None
+            elements = [x.root for x in rows if isinstance(x.root, etree._Element)]
+
+        # 行之间有嵌套时，按祖先分配结果会出错，退回逐行查询
+        if row_xpath and elements:
+            seen = set(elements)
+            if any(a in seen for row in elements for a in row.iterancestors()):
+                row_xpath = None
+
+        method = self._tostring_method
+        result = {}
+        for name, field in spec.items():
+            query = self._css2xpath(field.query) if field.css else field.query
+            values = _batch_values(self.query_cache, self.root, row_xpath, elements, query, self.namespaces, method)
             if values is None:
-                break
+                values = _row_values(self.query_cache, elements, query, self.namespaces, method)
+            pipeline = field.pipeline
+            result[name] = [pipeline.each(v, name) for v in values]
+
+        if columns:
+            return result
+        names = list(result)
+        return [{name: result[name][i] for name in names} for i in range(len(elements))]
+
+
+_RE_JSON_WS = re.compile(r'[ \t\n\r]*')
+_RE_PATH_KEY = re.compile(r'"((?:[^"\\]|\\.)*)"|([A-Za-z_][A-Za-z0-9_]*)')
+
+
+def _parse_path(path):
+    """只支持由标识符组成的jmespath子表达式，比如 data.items、data."item-list"
+    """
+    keys = []
+    pos = 0
+    while True:
+        m = _RE_PATH_KEY.match(path, pos)
+        if not m:
+            raise ValueError('stream path "{}" must be dotted identifiers'.format(path))
+        keys.append(json.loads('"{}"'.format(m.group(1))) if m.group(1) is not None else m.group(2))
+        pos = m.end()
+        if pos == len(path):
+            return keys
+        if path[pos] != '.':
+            raise ValueError('stream path "{}" must be dotted identifiers'.format(path))
+        pos += 1
+
+
+_JSON_DELIMITERS = frozenset(',]} \t\n\r')
+
+
+class _JsonStream(object):
+    """按块读取json文本，逐个解码数组元素，只缓存当前未解码的部分"""
+
+    def __init__(self, source, chunk_size=65536):
+        self.chunks = _iter_chunks(source, chunk_size)
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.raw_decode = json.JSONDecoder().raw_decode
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=0):
+        """至少追加size个字符，读到末尾返回False"""
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        added = 0
+        while not self.eof and added <= size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                text = self.decoder.decode(b'', final=True)
+            else:
+                text = self.decoder.decode(chunk)
+            self.buf += text
+            added += len(text)
+        return added > 0
+
+    def peek(self):
+        while True:
+            self.pos = _RE_JSON_WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars or not char:
+            raise ValueError('expect {!r} at char {}, got {!r}'.format(chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
             try:
-                values = proc(values)
-            except Exception as e:
-                break
-        values = op(values)
-        return self._save_mode(values)
+                obj, end = self.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise
+            else:
+                # 数字可能被截断在块边界上（如 12. 后面是 5），后面是分隔符或读到末尾才算完整
+                if self.eof or not isinstance(obj, (int, float)) or isinstance(obj, bool) or (
+                        end < len(self.buf) and self.buf[end] in _JSON_DELIMITERS):
+                    self.pos = end
+                    return obj
+            self._fill(len(self.buf) - self.pos)
+
+    def seek(self, keys):
+        """定位到keys指向的值之前，找不到返回False"""
+        for key in keys:
+            if self.peek() != '{':
+                return False
+            self.pos += 1
+            while True:
+                if self.peek() == '}':
+                    return False
+                name = self.value()
+                self.expect(':')
+                if name == key:
+                    break
+                self.value()
+                self.expect(',}')
+                if self.buf[self.pos - 1] == '}':
+                    return False
+        return True
+
+    def items(self):
+        if self.peek() != '[':
+            if self.peek():
+                yield self.value()
+            return
+        self.pos += 1
+        if self.peek() == ']':
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+class JmesList(object):
+    """jmespath结果的只读视图，直接引用结果列表，访问元素时才包装成JmesLoader"""
+
+    __slots__ = ('_values', '_expr', '_loader_cls')
+
+    def __init__(self, values=(), _expr=None, _loader_cls=None):
+        self._values = values
+        self._expr = _expr
+        self._loader_cls = _loader_cls or JmesLoader
 
-    def proc(self, *processors, op=TakeFirst()):
-        op = Identity() if op is None else op
-        return self._get_value(self.getall(), *processors, op=op)
+    def __len__(self):
+        return len(self._values)
 
+    def __bool__(self):
+        return bool(self._values)
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        cls, expr = self._loader_cls, self._expr
+        for value in self._values:
+            yield cls(value, expr)
 
-class JmesList(list):
     def __getitem__(self, pos):
-        o = super().__getitem__(pos)
-        return self.__class__(o) if isinstance(pos, slice) else o
-
-    @staticmethod
-    def _save_mode(values):
-        if isinstance(values, str):
-            return MagicStr(values)
-        elif isinstance(values, list):
-            return MagicList(values)
-        else:
-            return values
+        if isinstance(pos, slice):
+            return self.__class__(self._values[pos], self._expr, self._loader_cls)
+        return self._loader_cls(self._values[pos], self._expr)
 
-    def node(self, values):
-        return self.__class__(flatten(flatten([x.node(values) for x in self])))
+    def __str__(self):
+        return '[%s]' % ', '.join(repr(x) for x in self)
 
-    def _get_value(self, values, *processors, op=None):
-        values = self._save_mode(values)
-        for proc in processors:
-            if values is None:
-                break
-            try:
-                values = flatten(proc(value) for value in values if value)
-            except Exception as e:
-                break
-        values = op(values)
-        return self._save_mode(values)
+    __repr__ = __str__
+
+    _save_mode = staticmethod(_save_mode)
+
+    def node(self, query):
+        expr = self._loader_cls.cache.get(query)
+        values = []
+        for value in self._values:
+            result = expr.search(value)
+            if result is None:
+                continue
+            elif isinstance(result, (list, tuple)):
+                values.extend(result)
+            else:
+                values.append(result)
+        return self.__class__(values, query, self._loader_cls)
+
+    def _get_value(self, values, *processors, op=_OP_UNSET, field=None):
+        return Pipeline.build(processors, op).each(values, field)
 
     def getall(self):
-        return [x.getall() for x in self]
+        """返回底层结果列表本身，不复制"""
+        values = self._values
+        return values if isinstance(values, list) else list(values)
 
-    def proc(self, *processors, op=TakeFirst()):
-        op = Identity() if op is None else op
-        return self._get_value(self.getall(), *processors, op=op)
+    def proc(self, *processors, op=_OP_UNSET, field=None):
+        return self._get_value(self.getall(), *processors, op=op, field=field)
 
 
 class JmesLoader(object):
@@ -143,14 +791,35 @@ class JmesLoader(object):
     >>> print(loader.node('people[][first, missing][]').proc(op=Join(' ')))
     James 1111 Jacob Jayden different
     """
+    __slots__ = ('src_data', '_expr')
+
     jme_cls = JmesList
+    cache = jmes_cache
 
     def __init__(self, src_data, _expr=None):
         self.src_data = src_data
         self._expr = _expr
 
+    @classmethod
+    def iterload(cls, source, path=None, chunk_size=65536):
+        """流式读取json数组，逐个元素返回JmesLoader，内存占用与单个元素相当
+
+        source: bytes/str、类文件对象或bytes块的可迭代对象（如 r.iter_content()）
+        path: 数组所在位置，只支持由标识符组成的jmespath，比如 'data.items'，默认为顶层数组
+
+        >>> with open('dump.json', 'rb') as f:
+                for item in JmesLoader.iterload(f, 'data.people'):
+                    print(item.node('first').proc())
+        """
+        keys = _parse_path(path) if path else []
+        stream = _JsonStream(source, chunk_size)
+        if not stream.seek(keys):
+            return
+        for value in stream.items():
+            yield cls(value, path)
+
     def _get_node(self, node):
-        expr = compile(node)
+        expr = self.cache.get(node)
         result = expr.search(self.src_data)
         return result
 
@@ -165,9 +834,7 @@ class JmesLoader(object):
             pass
         else:
             values = [values]
-
-        values = [self.__class__(v, query) for v in values]
-        return self.jme_cls(values)
+        return self.jme_cls(values, query, self.__class__)
 
     def __bool__(self):
         return bool(self.getall())
@@ -190,27 +857,10 @@ class ComposeLoader(object):
         else:
             self.src_data = [src_data]
 
-    @staticmethod
-    def _save_mode(values):
-        if isinstance(values, str):
-            return MagicStr(values)
-        elif isinstance(values, list):
-            return MagicList(values)
-        else:
-            return values
+    _save_mode = staticmethod(_save_mode)
 
-    def _get_value(self, values, *processors, op=None):
-        values = self._save_mode(values)
-        for proc in processors:
-            if values is None:
-                break
-            try:
-                values = flatten(proc(value) for value in values if value)
-            except Exception as e:
-                break
-        values = op(values)
-        return self._save_mode(values)
+    def _get_value(self, values, *processors, op=_OP_UNSET, field=None):
+        return Pipeline.build(processors, op).each(values, field)
 
-    def proc(self, *processors, op=TakeFirst()):
-        op = Identity() if op is None else op
-        return self._get_value(self.src_data, *processors, op=op)
+    def proc(self, *processors, op=_OP_UNSET, field=None):
+        return self._get_value(self.src_data, *processors, op=op, field=field)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# 多进程解析，处理器需可pickle（tools中的处理器都可以，lambda不行）
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .loader import ItemLoader
+from .logger import line_logger
+
+__all__ = ['Extractor', 'parse_many']
+
+logger = line_logger(__name__)
+
+
+class Extractor(object):
+    """可pickle的抽取定义，输入页面bytes/str，输出ItemLoader.extract的结果
+
+    rows为None时，字段查询相对于整个文档，返回一个dict
+
+    >>> extractor = Extractor('.standard-table tbody tr', {
+            'name': Field('./td[1]//text()', ReFind(r'\\S+')),
+            'salary': Field('./td[2]//text()', ToFloat()),
+        })
+    >>> extractor(r.content)
+    [{'name': 'a', 'salary': 1.0}, ...]
+    """
+
+    def __init__(self, rows, spec, css=True, columns=False, encoding='utf8'):
+        self.rows = rows
+        self.spec = spec
+        self.css = css
+        self.columns = columns
+        self.encoding = encoding
+
+    def __call__(self, document):
+        if isinstance(document, bytes):
+            document = document.decode(self.encoding, errors='replace')
+        loader = ItemLoader(text=document)
+        if self.rows is None:
+            result = {}
+            for name, field in self.spec.items():
+                sel = loader.css(field.query) if field.css else loader.xpath(field.query)
+                result[name] = sel.proc(field.pipeline)
+            return result
+        return loader.extract(self.rows, self.spec, css=self.css, columns=self.columns)
+
+
+_extractor = None
+
+
+def _init_worker(extractor):
+    global _extractor
+    _extractor = extractor
+
+
+def _run(extractor, document):
+    try:
+        return _plain(extractor(document))
+    except Exception as e:
+        logger.warning(e)
+        return None
+
+
+def _plain(value):
+    """MagicStr/MagicList转成原始类型，不论在哪个进程解析，结果类型都一致"""
+    if isinstance(value, str):
+        return str(value)
+    elif isinstance(value, list):
+        return [_plain(v) for v in value]
+    elif isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def _run_chunk(chunk):
+    return [(i, _run(_extractor, doc)) for i, doc in chunk]
+
+
+def _chunks(documents, chunksize):
+    chunk = []
+    for item in enumerate(documents):
+        chunk.append(item)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_many(documents, extractor, workers=None, chunksize=16, ordered=True, max_pending=None):
+    """多进程批量解析页面
+
+    documents: 页面bytes/str的可迭代对象，按需读取，不会一次全部载入
+    extractor: 可pickle的可调用对象，一般用Extractor
+    workers: 进程数，默认cpu核数，<=1时在当前进程执行
+    chunksize: 每次发给子进程的页面数
+    ordered: True按输入顺序返回结果，False按完成顺序返回(index, result)
+    max_pending: 同时在途的chunk数，默认workers * 2，控制内存占用
+
+    解析失败的页面结果为None，结果中的字符串、列表都是原始的str、list
+
+    >>> for item in parse_many(pages, extractor, workers=32):
+            print(item)
+    >>> for i, item in parse_many(pages, extractor, ordered=False):
+            print(i, item)
+    """
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1:
+        for i, doc in enumerate(documents):
+            result = _run(extractor, doc)
+            yield result if ordered else (i, result)
+        return
+
+    max_pending = max_pending or workers * 2
+    chunks = _chunks(documents, max(chunksize, 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(extractor,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= max_pending:
+                break
+
+        if ordered:
+            while pending:
+                results = pending.popleft().result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(executor.submit(_run_chunk, chunk))
+                for _, result in results:
+                    yield result
+        else:
+            pending = set(pending)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        pending.add(executor.submit(_run_chunk, chunk))
+                    yield from future.result()
@@ -1,15 +1,33 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import json
+import random
+import threading
 import time
+from collections import deque
+from urllib.parse import urlsplit
 
 import requests
 
 from .logger import line_logger
 
-__all__ = ['get_proxy']
+__all__ = ['get_proxy', 'ProxyPool', 'aget_proxy', 'AsyncProxySource']
 
 logger = line_logger(__name__)
 
 
+def _parse_result(result):
+    """代理接口返回 {'message': 'success', 'data': ...}，失败返回None"""
+    if not isinstance(result, dict):
+        logger.warning('unexpected result: {!r}'.format(result))
+        return None
+    msg = result.get('message', '')
+    if msg == 'success':
+        return result['data']
+
+    logger.warning('msg: {}'.format(msg))
+
+
 def get_proxy(url):
     # url = 'http://127.0.0.1:5000/proxy'
     try:
@@ -18,8 +36,341 @@ def get_proxy(url):
         logger.warning(e)
         time.sleep(10)
     else:
-        msg = result.get('message', '')
-        if msg == 'success':
-            return result['data']
+        return _parse_result(result)
+
+
+def _proxy_key(proxy):
+    if isinstance(proxy, str):
+        return proxy
+    return json.dumps(proxy, sort_keys=True)
+
+
+class _Entry(object):
+    __slots__ = ('proxy', 'expire', 'success', 'failure', 'streak', 'latency')
+
+    def __init__(self, proxy, expire):
+        self.proxy = proxy
+        self.expire = expire
+        self.success = 0
+        self.failure = 0
+        self.streak = 0
+        self.latency = None
+
+    @property
+    def score(self):
+        """成功率（拉普拉斯平滑）除以平均耗时"""
+        rate = (self.success + 1.0) / (self.success + self.failure + 2.0)
+        return rate / (1.0 + (self.latency or 0.0))
+
+
+class ProxyPool(object):
+    """代理池，后台线程用一个Session从代理接口补充代理，acquire不会阻塞
+
+    url: 代理接口，返回格式同get_proxy，data可以是一个代理或代理列表
+    min_size: 池中代理少于该数量时补充
+    ttl: 代理的有效期（秒），过期后丢弃
+    max_failures: 连续失败次数达到后剔除
+    interval: 后台线程检查的间隔（秒）
+    timeout: 请求代理接口的超时（秒）
+    backoff: 接口出错时的等待时间范围（秒），每次失败翻倍，成功后复原
+
+    >>> pool = ProxyPool('http://127.0.0.1:5000/proxy', min_size=10, ttl=180)
+    >>> proxy = pool.acquire()          # 池为空时立即返回None
+    >>> start = time.time()
+    >>> try:
+            requests.get(url, proxies={'https': proxy}, timeout=10)
+        except Exception:
+            pool.report(proxy, False)
+        else:
+            pool.report(proxy, True, time.time() - start)
+    >>> pool.close()
+    """
+
+    def __init__(self, url, min_size=5, ttl=180, max_failures=3, interval=1, timeout=5, backoff=(1, 60),
+                 session=None, start=True):
+        self.url = url
+        self.min_size = min_size
+        self.ttl = ttl
+        self.max_failures = max_failures
+        self.interval = interval
+        self.timeout = timeout
+        self.backoff = backoff
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._keys = []
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        self.fetches = 0
+        self.errors = 0
+        self.evictions = 0
+        if start:
+            self.start()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ProxyPool', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _run(self):
+        delay = self.backoff[0]
+        while not self._closed:
+            self.purge()
+            if len(self._entries) < self.min_size:
+                if self.refill():
+                    delay = self.backoff[0]
+                    continue
+                self._wake.wait(delay)
+                delay = min(delay * 2, self.backoff[1])
+            else:
+                self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refill(self):
+        """请求一次代理接口，返回新加入的代理数量，出错时返回0"""
+        self.fetches += 1
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            data = _parse_result(response.json())
+        except Exception as e:
+            self.errors += 1
+            logger.warning(e)
+            return 0
+        if data is None:
+            self.errors += 1
+            return 0
+        return self.add(data if isinstance(data, list) else [data])
+
+    def add(self, proxies):
+        expire = time.monotonic() + self.ttl
+        added = 0
+        with self._lock:
+            for proxy in proxies:
+                key = _proxy_key(proxy)
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = _Entry(proxy, expire)
+                    self._keys.append(key)
+                    added += 1
+                else:
+                    entry.expire = expire
+        return added
+
+    def purge(self):
+        """丢弃过期的代理"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e.expire <= now]
+            for key in expired:
+                del self._entries[key]
+            if expired:
+                self._keys = list(self._entries)
+
+    def _remove(self, key):
+        del self._entries[key]
+        self._keys = list(self._entries)
+        self.evictions += 1
+
+    def acquire(self, default=None):
+        """随机取两个代理返回得分高的一个，池为空时唤醒后台线程并立即返回default"""
+        entry = None
+        with self._lock:
+            keys = self._keys
+            now = time.monotonic()
+            while keys:
+                key = max(random.choice(keys), random.choice(keys), key=lambda k: self._entries[k].score)
+                if self._entries[key].expire > now:
+                    entry = self._entries[key]
+                    break
+                del self._entries[key]
+                keys = self._keys = list(self._entries)
+        if entry is None or len(self._entries) < self.min_size:
+            self._wake.set()
+        return default if entry is None else entry.proxy
+
+    def report(self, proxy, ok, latency=None):
+        """反馈代理的使用结果，latency为耗时（秒），连续失败max_failures次后剔除"""
+        key = _proxy_key(proxy)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if ok:
+                entry.success += 1
+                entry.streak = 0
+                if latency is not None:
+                    entry.latency = latency if entry.latency is None else entry.latency * 0.7 + latency * 0.3
+            else:
+                entry.failure += 1
+                entry.streak += 1
+                if entry.streak >= self.max_failures:
+                    self._remove(key)
+        if len(self._entries) < self.min_size:
+            self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'fetches': self.fetches,
+                'errors': self.errors,
+                'evictions': self.evictions,
+                'proxies': {k: (e.success, e.failure, e.latency) for k, e in self._entries.items()},
+            }
+
+
+def _dechunk(body):
+    out = []
+    while body:
+        size, _, body = body.partition(b'\r\n')
+        size = int(size.split(b';')[0], 16)
+        if not size:
+            break
+        out.append(body[:size])
+        body = body[size + 2:]
+    return b''.join(out)
+
+
+async def _aget_json(url, timeout):
+    """只为请求代理接口的最小HTTP客户端，不依赖aiohttp"""
+    parts = urlsplit(url)
+    https = parts.scheme == 'https'
+    path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port or (443 if https else 80), ssl=https or None), timeout
+    )
+    try:
+        writer.write('GET {} HTTP/1.1\r\nHost: {}\r\nAccept: application/json\r\nConnection: close\r\n\r\n'.format(
+            path, parts.netloc).encode('latin-1'))
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, body = raw.partition(b'\r\n\r\n')
+    if b'transfer-encoding: chunked' in head.lower():
+        body = _dechunk(body)
+    return json.loads(body)
+
+
+async def aget_proxy(url, timeout=10):
+    """get_proxy的异步版本，返回格式相同；出错时不等待，直接返回None"""
+    try:
+        result = await _aget_json(url, timeout)
+    except Exception as e:
+        logger.warning(e)
+    else:
+        return _parse_result(result)
+
+
+class AsyncProxySource(object):
+    """asyncio代理源，预取一批代理，get的返回格式同get_proxy
+
+    url: 代理接口，data可以是一个代理或代理列表
+    min_size: 池中代理少于该数量时在后台预取
+    ttl: 代理的有效期（秒）
+    reuse: False时每个代理只返回一次（同get_proxy），True时轮流复用直到过期
+    timeout: 请求代理接口的超时（秒）
+    backoff: 接口出错后暂停请求的时间范围（秒），每次失败翻倍，成功后复原
+
+    同时有多个协程在等待时只请求一次接口；退避期间get立即返回default，不会阻塞事件循环
+
+    >>> source = AsyncProxySource('http://127.0.0.1:5000/proxy', min_size=20)
+    >>> async def fetch(url):
+            proxy = await source.get()
+            ...
+    >>> await asyncio.gather(*(fetch(url) for url in urls))
+    >>> source.close()
+    """
+
+    def __init__(self, url, min_size=5, ttl=180, reuse=False, timeout=5, backoff=(1, 60)):
+        self.url = url
+        self.min_size = min_size
+        self.ttl = ttl
+        self.reuse = reuse
+        self.timeout = timeout
+        self.backoff = backoff
+        self._pool = deque()
+        self._task = None
+        self._delay = backoff[0]
+        self._retry_at = 0.0
+        self.fetches = 0
+        self.errors = 0
+
+    def __len__(self):
+        return len(self._pool)
+
+    def _pop(self):
+        now = time.monotonic()
+        pool = self._pool
+        while pool:
+            proxy, expire = pool.popleft()
+            if expire > now:
+                if self.reuse:
+                    pool.append((proxy, expire))
+                return proxy
+        return None
+
+    def _refill(self):
+        """返回进行中的预取任务，没有时新建；退避期间返回None"""
+        if self._task is None and time.monotonic() >= self._retry_at:
+            self._task = asyncio.ensure_future(self._fetch())
+        return self._task
+
+    async def _fetch(self):
+        """请求一次接口，返回新加入的代理数量"""
+        self.fetches += 1
+        try:
+            data = await aget_proxy(self.url, self.timeout)
+            if data is None:
+                self.errors += 1
+                self._retry_at = time.monotonic() + self._delay
+                self._delay = min(self._delay * 2, self.backoff[1])
+                return 0
+            expire = time.monotonic() + self.ttl
+            proxies = data if isinstance(data, list) else [data]
+            self._pool.extend((proxy, expire) for proxy in proxies)
+            self._delay = self.backoff[0]
+            return len(proxies)
+        finally:
+            self._task = None
+
+    async def get(self, default=None):
+        proxy = self._pop()
+        if proxy is None or len(self._pool) < self.min_size:
+            task = self._refill()
+            # 池已空：等待预取（多个协程共用同一次请求），取完仍为空时再请求下一批
+            while proxy is None and task is not None:
+                try:
+                    await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    # close()取消了预取任务，等待中的协程返回default；自身被取消时照常抛出
+                    if task.cancelled():
+                        return default
+                    raise
+                proxy = self._pop()
+                if proxy is None and not task.result():
+                    break
+                task = self._refill() if proxy is None else None
+        return default if proxy is None else proxy
 
-        logger.warning('msg: {}'.format(msg))
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -2,16 +2,23 @@
 # 该模块主要用于loader做处理函数，也可以单独使用
 
 import re
+import time
+import unicodedata
+from array import array
 from datetime import datetime
 
 import arrow
+from arrow.parser import DateTimeParser, ParserMatchError
+from dateutil import tz
+from parsel.utils import _is_listlike, flatten
 
-from .mapping import BAIJIAXING
+from .mapping import load_baijiaxing
 
 __all__ = [
     'MagicBase', 'MagicList', 'MagicStr', 'TakeFirst', 'Identity', 'Strip', 'Split', 'ReSplit',
     'ReFind', 'ReSub', 'Join', 'ToInt', 'ToAge', 'HighestDegree', 'DateToBack', 'CheckName', 'CheckSurname',
-    'FormatTime', 'TakeByIndex', 'ToFloat', 'TakeAllTrue',
+    'FormatTime', 'TakeByIndex', 'ToFloat', 'TakeAllTrue', 'RegexSet', 'SurnameTrie', 'surname_trie',
+    'SurnamePinyin', 'pinyin_table', 'ToNumber', 'Normalize',
 ]
 
 
@@ -48,17 +55,41 @@ class MagicList(list, metaclass=MetaClass):
     None
     """
 
+    __slots__ = ()
+
     def __getitem__(self, item):
-        return MagicBase(list.__getitem__)(self, item)
+        # 整数下标先判断范围，越界时不走异常
+        if item.__class__ is int:
+            size = len(self)
+            return list.__getitem__(self, item) if -size <= item < size else None
+        try:
+            return list.__getitem__(self, item)
+        except Exception as e:
+            return None
 
     def get(self, item, default=None):
-        result = MagicBase(list.__getitem__)(self, item)
+        result = self[item]
         if result is None:
             result = default
         return result
 
     def pop(self, index=-1):
-        return MagicBase(list.pop)(self, index)
+        if index.__class__ is int:
+            size = len(self)
+            return list.pop(self, index) if -size <= index < size else None
+        try:
+            return list.pop(self, index)
+        except Exception as e:
+            return None
+
+    def __reduce__(self):
+        # 类名被改成了list，按原始list序列化
+        return list, (list(self),)
+
+    @classmethod
+    def wrap(cls, values):
+        """已经是MagicList的直接返回，不再复制"""
+        return values if isinstance(values, cls) else cls(values)
 
 
 class MagicStr(str, metaclass=MetaClass):
@@ -70,11 +101,41 @@ class MagicStr(str, metaclass=MetaClass):
     None
     """
 
+    __slots__ = ()
+
     def __str__(self, *args, **kwargs):
         return super(MagicStr, self).__str__(*args, **kwargs)
 
     def __getitem__(self, item):
-        return MagicBase(str.__getitem__)(self, item)
+        if item.__class__ is int:
+            size = len(self)
+            return str.__getitem__(self, item) if -size <= item < size else None
+        try:
+            return str.__getitem__(self, item)
+        except Exception as e:
+            return None
+
+    def __reduce__(self):
+        return str, (str.__str__(self),)
+
+    @classmethod
+    def wrap(cls, value):
+        """已经是MagicStr的直接返回，不再复制"""
+        return value if isinstance(value, cls) else cls(value)
+
+
+def _flatten_into(out, value):
+    """与parsel.utils.flatten展开规则一致，直接追加到out，不生成中间列表"""
+    if isinstance(value, (str, bytes)) or not _is_listlike(value):
+        out.append(value)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            if isinstance(v, (str, bytes)) or not _is_listlike(v):
+                out.append(v)
+            else:
+                _flatten_into(out, v)
+    else:
+        out.extend(flatten(value))
 
 
 # 以下对列表操作
@@ -140,6 +201,77 @@ class Strip(object):
         else:
             return value
 
+    def batch(self, values):
+        """批量处理，结果与逐个调用后展开一致，下同"""
+        chars = self.chars
+        out = []
+        for value in values:
+            if isinstance(value, str):
+                out.append(value.strip(chars))
+            else:
+                _flatten_into(out, value)
+        return out
+
+
+_FULLWIDTH = {0x3000: ' '}
+_FULLWIDTH.update({i: i - 0xFEE0 for i in range(0xFF01, 0xFF5F)})
+_ZERO_WIDTH = dict.fromkeys([0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF, 0x00AD])
+_WHITESPACE = {i: ' ' for i in [0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0xA0, 0x1680, 0x2028, 0x2029, 0x202F, 0x205F]}
+_WHITESPACE.update({i: ' ' for i in range(0x2000, 0x200B)})
+_ENTITIES = ('&nbsp;', '&#160;', '&#xa0;')
+
+
+class Normalize(object):
+    """一次遍历完成的文本规整：全角转半角、去零宽字符、各种空白（含&nbsp;）转空格并合并
+
+    转换表在创建时生成，table可追加自定义的str.translate映射；collapse合并空白时同时去掉首尾空白
+
+    >>> Normalize()('  ＡＢＣ１２３，\u200b你好&nbsp;\u3000世界\n ')
+    'ABC123,你好 世界'
+    >>> Normalize(fullwidth=False, collapse=False)('ＡＢ  c\u200b ')
+    'ＡＢ  c'
+    """
+
+    def __init__(self, fullwidth=True, zero_width=True, whitespace=True, entities=True, collapse=True, strip=True,
+                 table=None):
+        mapping = {}
+        if fullwidth:
+            mapping.update(_FULLWIDTH)
+        if zero_width:
+            mapping.update(_ZERO_WIDTH)
+        if whitespace:
+            mapping.update(_WHITESPACE)
+        if table:
+            mapping.update(str.maketrans(table))
+        self.table = mapping
+        self.entities = entities
+        self.collapse = collapse
+        self.strip = strip
+        # 纯ASCII文本不需要查表：表中ASCII字符只有空白，合并空白时split已经处理
+        self._skip_ascii = all(
+            k >= 128 or (collapse and chr(k).isspace() and v == ' ') for k, v in mapping.items()
+        )
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return value
+        if self.entities and '&' in value:
+            for entity in _ENTITIES:
+                value = value.replace(entity, ' ')
+        if not (self._skip_ascii and value.isascii()):
+            value = value.translate(self.table)
+        if self.collapse:
+            value = ' '.join(value.split())
+        elif self.strip:
+            value = value.strip()
+        return value
+
+    def batch(self, values):
+        out = []
+        for value in values:
+            _flatten_into(out, self(value))
+        return out
+
 
 class Split(object):
     def __init__(self, sep, maxsplit=-1):
@@ -152,31 +284,67 @@ class Split(object):
         else:
             return MagicList()
 
+    def batch(self, values):
+        sep, maxsplit = self.sep, self.maxsplit
+        out = []
+        for value in values:
+            if isinstance(value, str):
+                out.extend(value.split(sep, maxsplit))
+        return out
+
+
+def _compile(pattern, flags):
+    """已编译的正则直接使用"""
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern, flags)
+
 
 class ReSplit(object):
     def __init__(self, pattern, maxsplit=0, flags=0):
         self.pattern = pattern
         self.maxsplit = maxsplit
         self.flags = flags
+        self.regex = _compile(pattern, flags)
 
     def __call__(self, value: str):
         if isinstance(value, str):
-            return MagicList(re.split(self.pattern, value, self.maxsplit, self.flags))
+            return MagicList(self.regex.split(value, self.maxsplit))
         else:
             return value
 
+    def batch(self, values):
+        split = self.regex.split
+        maxsplit = self.maxsplit
+        out = []
+        for value in values:
+            if isinstance(value, str):
+                _flatten_into(out, split(value, maxsplit))
+            else:
+                _flatten_into(out, value)
+        return out
+
 
 class ReFind(object):
     def __init__(self, pattern, flags=re.S):
         self.pattern = pattern
         self.flags = flags
+        self.regex = _compile(pattern, flags)
 
     def __call__(self, value: str):
         if isinstance(value, str):
-            return MagicList(re.findall(self.pattern, value, self.flags))
+            return MagicList(self.regex.findall(value))
         else:
             return MagicList()
 
+    def batch(self, values):
+        findall = self.regex.findall
+        out = []
+        for value in values:
+            if isinstance(value, str):
+                _flatten_into(out, findall(value))
+        return out
+
 
 class ReSub(object):
     def __init__(self, pattern, repl, count=0, flags=re.S):
@@ -184,13 +352,73 @@ class ReSub(object):
         self.repl = repl
         self.count = count
         self.flags = flags
+        self.regex = _compile(pattern, flags)
 
     def __call__(self, value: str):
         if isinstance(value, str):
-            return MagicStr(re.sub(self.pattern, self.repl, value, self.count, self.flags))
+            return MagicStr(self.regex.sub(self.repl, value, self.count))
         else:
             return MagicStr()
 
+    def batch(self, values):
+        sub = self.regex.sub
+        repl, count = self.repl, self.count
+        return [sub(repl, value, count) if isinstance(value, str) else '' for value in values]
+
+
+class RegexSet(object):
+    """多个正则合并成一个分支表达式，一次扫描得到所有命中的名字
+
+    同一位置多个正则都能匹配时只记前面的那个，各正则内不要使用命名分组
+
+    >>> rs = RegexSet({'phone': r'1\d{10}', 'email': r'[\w.]+@[\w.]+'})
+    >>> rs('电话 13800000000, 邮箱 a@b.com')
+    ['phone', 'email']
+    >>> rs.findall('电话 13800000000, 邮箱 a@b.com')
+    {'phone': ['13800000000'], 'email': ['a@b.com']}
+    """
+
+    def __init__(self, patterns, flags=re.S):
+        if isinstance(patterns, dict):
+            patterns = list(patterns.items())
+        self.patterns = patterns
+        self.flags = flags
+        self.names = {}
+        parts = []
+        for i, (name, pattern) in enumerate(patterns):
+            if isinstance(pattern, re.Pattern):
+                pattern = pattern.pattern
+            group = '_g{}'.format(i)
+            self.names[group] = name
+            parts.append('(?P<{}>{})'.format(group, pattern))
+        self.regex = re.compile('|'.join(parts), flags)
+
+    def __call__(self, value: str):
+        """命中的名字，按首次出现的顺序去重"""
+        if not isinstance(value, str):
+            return MagicList()
+        names = self.names
+        hits = {}
+        for m in self.regex.finditer(value):
+            hits[names[m.lastgroup]] = None
+        return MagicList(hits)
+
+    def findall(self, value: str):
+        """{名字: [命中的文本]}"""
+        result = {}
+        if not isinstance(value, str):
+            return result
+        names = self.names
+        for m in self.regex.finditer(value):
+            result.setdefault(names[m.lastgroup], []).append(m.group())
+        return result
+
+    def batch(self, values):
+        out = []
+        for value in values:
+            out.extend(self(value))
+        return out
+
 
 class Join(object):
     def __init__(self, separator=u''):
@@ -199,7 +427,10 @@ class Join(object):
     def __call__(self, values):
         if isinstance(values, (list, tuple)):
             values = [value for value in values if value]
-        return MagicBase(self.separator.join)(values)
+        try:
+            return self.separator.join(values)
+        except Exception as e:
+            return None
 
 
 class ToFloat(object):
@@ -217,6 +448,47 @@ class ToFloat(object):
         else:
             return result
 
+    def batch(self, values):
+        default = self.default
+        out = []
+        for value in values:
+            try:
+                if isinstance(value, str):
+                    out.append(float(value.strip().replace(',', '')))
+                else:
+                    out.append(float(value))
+            except Exception as e:
+                _flatten_into(out, default)
+        return out
+
+    def to_array(self, values, numpy=False):
+        """整列转浮点数组，返回(数组, 有效标记)，无效位置为nan
+
+        >>> data, mask = ToFloat().to_array(['1,000', 'x', 2])
+        >>> data, mask
+        (array('d', [1000.0, nan, 2.0]), bytearray(b'\\x01\\x00\\x01'))
+        >>> data, mask = ToFloat().to_array(['1,000', 'x', 2], numpy=True)    # 需要安装numpy
+        """
+        nan = float('nan')
+        data = array('d')
+        mask = bytearray()
+        for value in values:
+            try:
+                if isinstance(value, str):
+                    data.append(float(value.strip().replace(',', '')))
+                else:
+                    data.append(float(value))
+            except Exception as e:
+                data.append(nan)
+                mask.append(0)
+            else:
+                mask.append(1)
+
+        if numpy:
+            import numpy as np
+            return np.frombuffer(data, dtype=np.float64).copy(), np.frombuffer(mask, dtype=np.bool_).copy()
+        return data, mask
+
 
 class ToInt(object):
     def __init__(self, default=None):
@@ -224,19 +496,179 @@ class ToInt(object):
 
     def __call__(self, value: [str, int, float]):
         try:
-            result = int(ToFloat()(value))
+            if isinstance(value, str):
+                result = int(float(value.strip().replace(',', '')))
+            else:
+                result = int(float(value))
         except Exception as e:
             return self.default
         else:
             return result
 
+    def batch(self, values):
+        default = self.default
+        out = []
+        for value in values:
+            try:
+                if isinstance(value, str):
+                    out.append(int(float(value.strip().replace(',', ''))))
+                else:
+                    out.append(int(float(value)))
+            except Exception as e:
+                _flatten_into(out, default)
+        return out
+
+
+_NUMBER_UNITS = {'百': 1e2, '千': 1e3, 'k': 1e3, 'K': 1e3, '万': 1e4, 'w': 1e4, 'W': 1e4, '亿': 1e8}
+_NUM = r'(\d[\d,]*(?:\.\d*)?|\.\d+)'
+_UNIT = r'\s*([百千万亿]+|[kKwW](?![A-Za-z]))?'
+_RE_NUMBER = re.compile(r'([+-]?)' + _NUM + _UNIT + r'(?:\s*(?:-|~|～|至|到|—|–)\s*' + _NUM + _UNIT + r')?')
+
+
+class ToNumber(object):
+    """数字字符串转数字，一次扫描处理千分位、中文/英文单位和范围
+
+    支持的单位：百、千、万、亿、k/K（千）、w/W（万），可组合，比如百万、千万
+    span: 范围的取值方式，low 下限，high 上限，mean 平均，both 返回[下限, 上限]
+    cast: 结果类型，默认float
+
+    >>> ToNumber()('1.2万')
+    12000.0
+    >>> ToNumber(span='both')('月薪8-12K')
+    [8000.0, 12000.0]
+    >>> ToNumber(span='both')('5000-1万')
+    [5000.0, 10000.0]
+    >>> ToNumber(cast=int)('3亿')
+    300000000
+    """
+
+    def __init__(self, span='low', cast=float, default=None):
+        if span not in ('low', 'high', 'mean', 'both'):
+            raise ValueError('span must be one of low, high, mean, both')
+        self.span = span
+        self.cast = cast
+        self.default = default
+
+    @staticmethod
+    def _scale(unit):
+        scale = 1.0
+        for char in unit:
+            scale *= _NUMBER_UNITS[char]
+        return scale
+
+    def _parse(self, value):
+        """返回(下限, 上限)，不是范围时两者相同，无法解析返回None"""
+        if not isinstance(value, str):
+            if isinstance(value, (int, float)):
+                return float(value), float(value)
+            return None
+        m = _RE_NUMBER.search(value)
+        if m is None:
+            return None
+        sign, low, low_unit, high, high_unit = m.groups()
+        low = float(low.replace(',', ''))
+        if sign == '-':
+            low = -low
+        if high is None:
+            if low_unit:
+                low *= self._scale(low_unit)
+            return low, low
+        high = float(high.replace(',', ''))
+        # 只有上限带单位时下限借用（8-12K），借用后下限大于上限则不借用（5000-1万）；
+        # 只有下限带单位时，上限本身不小于下限就不借用（1万-15000），否则借用（8K-12）
+        if low_unit and not high_unit:
+            low *= self._scale(low_unit)
+            if high < low:
+                high *= self._scale(low_unit)
+        elif high_unit and not low_unit:
+            high *= self._scale(high_unit)
+            if low * self._scale(high_unit) <= high:
+                low *= self._scale(high_unit)
+        elif low_unit:
+            low *= self._scale(low_unit)
+            high *= self._scale(high_unit)
+        return low, high
+
+    def _pick(self, pair):
+        low, high = pair
+        span, cast = self.span, self.cast
+        if span == 'low':
+            return cast(low)
+        elif span == 'high':
+            return cast(high)
+        elif span == 'mean':
+            return cast((low + high) / 2)
+        return MagicList([cast(low), cast(high)])
+
+    def __call__(self, value):
+        try:
+            pair = self._parse(value)
+            if pair is None:
+                return self.default
+            return self._pick(pair)
+        except Exception as e:
+            return self.default
+
+    def batch(self, values):
+        default = self.default
+        out = []
+        for value in values:
+            try:
+                pair = self._parse(value)
+                result = default if pair is None else self._pick(pair)
+            except Exception as e:
+                result = default
+            _flatten_into(out, result)
+        return out
+
+    def to_array(self, values, numpy=False):
+        """整列转浮点数组，返回(数组, 有效标记)，无效位置为nan；span='both'时返回(下限数组, 上限数组, 有效标记)
+
+        >>> ToNumber().to_array(['1.2万', 'x', '8-12K'])
+        (array('d', [12000.0, nan, 8000.0]), bytearray(b'\\x01\\x00\\x01'))
+        """
+        nan = float('nan')
+        lows, highs = array('d'), array('d')
+        mask = bytearray()
+        span = self.span
+        for value in values:
+            try:
+                pair = self._parse(value)
+            except Exception as e:
+                pair = None
+            if pair is None:
+                lows.append(nan)
+                highs.append(nan)
+                mask.append(0)
+                continue
+            low, high = pair
+            if span == 'high':
+                low = high
+            elif span == 'mean':
+                low = (low + high) / 2
+            lows.append(low)
+            highs.append(high)
+            mask.append(1)
+
+        if numpy:
+            import numpy as np
+            lows = np.frombuffer(lows, dtype=np.float64).copy()
+            highs = np.frombuffer(highs, dtype=np.float64).copy()
+            mask = np.frombuffer(mask, dtype=np.bool_).copy()
+        if span == 'both':
+            return lows, highs, mask
+        return lows, mask
+
 
 class ToAge(object):
     """出生日期转年龄"""
 
+    def __init__(self):
+        self.format_time = FormatTime()
+
     def __call__(self, value):
         if isinstance(value, str):
-            date = FormatTime()(value)
+            date = self.format_time(value)
         elif isinstance(value, datetime):
             date = value
         else:
@@ -247,113 +679,543 @@ class ToAge(object):
         else:
             return None
 
+    def batch(self, values):
+        """整列计算，当前年份只取一次"""
+        year = datetime.now().year
+        format_time = self.format_time
+        out = []
+        for value in values:
+            if isinstance(value, str):
+                date = format_time(value)
+            elif isinstance(value, datetime):
+                date = value
+            else:
+                date = None
+            out.append(year - date.year if date else None)
+        return out
+
+    def to_array(self, values, numpy=False):
+        """整列转年龄数组，返回(数组, 有效标记)，无效位置为0
+
+        >>> ToAge().to_array(['1990-01-01', 'x'])
+        (array('q', [36, 0]), bytearray(b'\\x01\\x00'))
+        """
+        data = array('q')
+        mask = bytearray()
+        for age in self.batch(values):
+            if age is None:
+                data.append(0)
+                mask.append(0)
+            else:
+                data.append(age)
+                mask.append(1)
+
+        if numpy:
+            import numpy as np
+            return np.frombuffer(data, dtype=np.int64).copy(), np.frombuffer(mask, dtype=np.bool_).copy()
+        return data, mask
+
 
 class HighestDegree(object):
     """找出最高学历"""
 
+    degree_mapping = {
+        5: '博士',
+        4: '硕士',
+        3: '本科',
+        2: '大专',
+    }
+    degree_set = RegexSet(degree_mapping)
+
     def __call__(self, value):
-        degree_mapping = {
-            5: '博士',
-            4: '硕士',
-            3: '本科',
-            2: '大专',
-        }
-        seen = set()
-        for k, v in degree_mapping.items():
-            match = ReFind(v)(value)[0]
-            if match:
-                seen.add(k)
+        seen = self.degree_set(value)
         if seen:
-            return degree_mapping.get(max(seen))
+            return self.degree_mapping.get(max(seen))
         else:
             return None
 
 
+_RELATIVE_STRICT = r'''
+    秒钟?|分钟|周|个?星期|个?礼拜|个月|年
+    |(?:seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|months?|years?)\b'''
+_RELATIVE_LOOSE = r'小时|个?钟头|天|日'
+_RE_RELATIVE = re.compile(r'''
+    (?P<today>刚刚|今天|今日|在线|\bjust\s+now\b|\btoday\b)
+    |(?P<yesterday>昨天|昨日|\byesterday\b)
+    |(?P<before_yesterday>前天|前日)
+    |(?P<last_week>上周|上个?星期|上个?礼拜|\blast\s+week\b)
+    |(?P<last_month>上个?月|\blast\s+month\b)
+    |(?P<last_year>去年|\blast\s+year\b)
+    |(?:(?P<num>\d+)|\b(?P<one>an?|one)\s)\s*(?:
+        # 天/小时与原来一样可以不带后缀（3天、1小时内）
+        (?P<loose>%s)
+        # 其余单位必须以 前/ago 结尾，可以隔着后面的数字单位（1年3个月前），避免 3年经验 之类误判
+        |(?P<unit>%s)(?=(?:\s*\d+\s*(?:%s|%s))*\s*(?:[以之]?前|ago\b)))
+''' % (_RELATIVE_LOOSE, _RELATIVE_STRICT, _RELATIVE_STRICT, _RELATIVE_LOOSE), re.I | re.X)
+
+# 单位 -> arrow.shift参数名
+_RELATIVE_UNITS = {
+    '秒': 'seconds', '分': 'minutes', '小': 'hours', '钟': 'hours', '天': 'days', '日': 'days',
+    '周': 'weeks', '星': 'weeks', '礼': 'weeks', '月': 'months', '年': 'years',
+    'se': 'seconds', 'mi': 'minutes', 'ho': 'hours', 'hr': 'hours', 'da': 'days',
+    'we': 'weeks', 'mo': 'months', 'ye': 'years',
+}
+# 同时出现多个时，与原来的 今天 > 天 > 小时 一致，取粒度最粗的（1天3小时前 按1天算）
+_RELATIVE_RANK = {'today': 0, 'years': 1, 'months': 2, 'weeks': 3, 'days': 4, 'hours': 5, 'minutes': 6, 'seconds': 7}
+_RELATIVE_FIXED = {
+    'today': ('today', 0), 'yesterday': ('days', 1), 'before_yesterday': ('days', 2),
+    'last_week': ('weeks', 1), 'last_month': ('months', 1), 'last_year': ('years', 1),
+}
+
+
+def _relative_unit(text):
+    text = text.lower().lstrip('个')
+    return _RELATIVE_UNITS[text[:2] if text[0].isascii() else text[0]]
+
+
 class DateToBack(object):
-    """根据已过多少天或小时，计算事件发生的时间"""
+    """根据已过多少时间，计算事件发生的时间
+
+    支持 刚刚/今天/昨天/前天/上周/上个月/去年、N天/小时（可不带前）、N秒/分钟/周/个月/年前，以及 3 hours ago、a day ago 等英文写法，
+    一次扫描完成。秒/分钟/周/月/年及英文必须以 前/以前/之前/ago 结尾，'3年经验'、'2021年05月03日' 不算。
+    同时出现多个时今天优先，其余取粒度最粗的（1天3小时前 按1天算）。按天及以上计算的取当天12点，按小时计算的取整点，按分钟计算的取整分。
+
+    当前时间按bucket秒缓存，同一时间段内相同的输入只计算一次；batch整列只取一次当前时间。
+
+    >>> DateToBack()('3小时前')
+    datetime.datetime(2021, 5, 3, 9, 0, tzinfo=tzlocal())
+    >>> DateToBack()('3年经验 2小时前发布')
+    datetime.datetime(2021, 5, 3, 10, 0, tzinfo=tzlocal())
+    >>> DateToBack()('1天3小时前')
+    datetime.datetime(2021, 5, 2, 12, 0, tzinfo=tzlocal())
+    >>> DateToBack().batch(['昨天', '5分钟前', '2 weeks ago'])
+    """
+
+    def __init__(self, bucket=1):
+        self.bucket = bucket
+        self._anchor = None
+
+    @staticmethod
+    def _parse(value):
+        """返回(单位, 数量)，没有可识别的时间返回None"""
+        best = None
+        best_rank = 99
+        for m in _RE_RELATIVE.finditer(value):
+            kind = m.lastgroup
+            if kind == 'loose':
+                # 日期中的 05月03日 不是相对时间
+                if m.group('loose') == '日' and m.start() and value[m.start() - 1] == '月':
+                    continue
+                unit = _relative_unit(m.group('loose'))
+                num = int(m.group('num'))
+            elif kind == 'unit':
+                unit = _relative_unit(m.group('unit'))
+                num = int(m.group('num')) if m.group('num') else 1
+            else:
+                unit, num = _RELATIVE_FIXED[kind]
+            rank = _RELATIVE_RANK[unit]
+            if rank < best_rank:
+                best, best_rank = (unit, num), rank
+                if rank == 0:
+                    break
+        return best
+
+    def _now(self):
+        if not self.bucket:
+            return arrow.now(), {}
+        bucket = int(time.time() // self.bucket)
+        anchor = self._anchor
+        if anchor is None or anchor[0] != bucket:
+            anchor = self._anchor = (bucket, arrow.now(), {})
+        return anchor[1], anchor[2]
+
+    @staticmethod
+    def _resolve(now, memo, value):
+        key = DateToBack._parse(value)
+        if key is None:
+            return None
+        date = memo.get(key)
+        if date is None:
+            unit, num = key
+            if unit == 'hours':
+                arw = now.replace(minute=0, second=0, microsecond=0)
+            elif unit == 'minutes':
+                arw = now.replace(second=0, microsecond=0)
+            elif unit == 'seconds':
+                arw = now.replace(microsecond=0)
+            else:
+                arw = now.replace(hour=12, minute=0, second=0, microsecond=0)
+            try:
+                date = arw.datetime if unit == 'today' else arw.shift(**{unit: -num}).datetime
+            except Exception as e:
+                return None
+            memo[key] = date
+        return date
 
     def __call__(self, values):
         if not isinstance(values, str):
             return None
+        now, memo = self._now()
+        return self._resolve(now, memo, values)
 
-        values = re.sub(r'昨日|昨天', '1天', values)
-        values = re.sub(r'前日|前天', '2天', values)
-        today = ReFind(r'今日|刚刚|今天|在线')(values)[0]
-        re_day = ReFind(r'(\d+?)[天日]')(values)[0]
-        re_hour = ReFind(r'(\d+?)小时')(values)[0]
-        if today:
-            _date = arrow.now().replace(hour=12, minute=0, second=0, microsecond=0).datetime
-        elif re_day:
-            arw = arrow.now().replace(hour=12, minute=0, second=0, microsecond=0)
-            _date = arw.shift(days=-int(re_day)).datetime
-        elif re_hour:
-            arw = arrow.now().replace(minute=0, second=0, microsecond=0)
-            _date = arw.shift(hours=-int(re_hour)).datetime
-        else:
-            _date = None
-        return _date
+    def batch(self, values):
+        now, memo = arrow.now(), {}
+        return [self._resolve(now, memo, value) if isinstance(value, str) else None for value in values]
+
+
+class SurnameTrie(object):
+    """姓氏前缀树，按最长匹配识别复姓
+
+    >>> trie = surname_trie()
+    >>> trie.match('欧阳修')
+    '欧阳'
+    >>> trie.split('欧阳修')
+    ('欧阳', '修')
+    >>> trie.split_many(['张三', '司马光', 'abc'])
+    [('张', '三'), ('司马', '光'), (None, 'abc')]
+    """
+
+    def __init__(self, surnames):
+        self.root = {}
+        for surname in surnames:
+            node = self.root
+            for char in surname:
+                node = node.setdefault(char, {})
+            node[''] = surname
+
+    def prefixes(self, value):
+        """value开头所有能匹配的姓氏，由短到长"""
+        result = []
+        node = self.root
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+            surname = node.get('')
+            if surname is not None:
+                result.append(surname)
+        return result
+
+    def match(self, value):
+        """最长匹配的姓氏，没有返回None"""
+        surname = None
+        node = self.root
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+            surname = node.get('', surname)
+        return surname
+
+    def split(self, value):
+        """(姓, 名)，没有匹配的姓氏时返回(None, value)"""
+        surname = self.match(value)
+        if surname is None:
+            return None, value
+        return surname, value[len(surname):]
+
+    def split_many(self, values):
+        split = self.split
+        return [split(value) if isinstance(value, str) else (None, value) for value in values]
+
+
+_SURNAME_TRIE = None
+
+
+def surname_trie():
+    """由BAIJIAXING构建的姓氏前缀树，第一次调用时构建"""
+    global _SURNAME_TRIE
+    if _SURNAME_TRIE is None:
+        _SURNAME_TRIE = SurnameTrie(load_baijiaxing())
+    return _SURNAME_TRIE
+
+
+_PINYIN_STYLES = ('tone', 'plain', 'initials')
+_PINYIN_TONES = dict.fromkeys(map(ord, '\u0300\u0301\u0304\u030c'))
+_PINYIN_TABLES = {}
+
+
+def _pinyin_syllables(style):
+    """{姓氏: (音节, ...)}，plain去掉声调、ü写作v，initials取每个音节首字母"""
+    table = {}
+    for surname, pinyin in load_baijiaxing().items():
+        syllables = pinyin.split()
+        if style != 'tone':
+            syllables = [
+                unicodedata.normalize('NFC', unicodedata.normalize('NFD', x).translate(_PINYIN_TONES)).replace('ü', 'v')
+                for x in syllables
+            ]
+        if style == 'initials':
+            syllables = [x[0] for x in syllables]
+        table[surname] = tuple(syllables)
+    return table
+
+
+def pinyin_table(style='plain', sep=' '):
+    """姓氏到拼音的查找表，每种(style, sep)第一次使用时生成"""
+    if style not in _PINYIN_STYLES:
+        raise ValueError('style must be one of {}'.format(_PINYIN_STYLES))
+    key = (style, sep)
+    table = _PINYIN_TABLES.get(key)
+    if table is None:
+        table = _PINYIN_TABLES[key] = {k: sep.join(v) for k, v in _pinyin_syllables(style).items()}
+    return table
+
+
+class SurnamePinyin(object):
+    """姓名转姓氏拼音，支持复姓
+
+    style: tone 带声调，plain 不带声调（ü写作v），initials 首字母
+
+    >>> SurnamePinyin()('欧阳修')
+    'ou yang'
+    >>> SurnamePinyin('tone')('吕布')
+    'lǚ'
+    >>> SurnamePinyin('initials', sep='')('欧阳修')
+    'oy'
+    >>> SurnamePinyin(sep='').batch(['张三', '司马光', 'abc'])
+    ['zhang', 'sima', None]
+    """
+
+    def __init__(self, style='plain', sep=' ', default=None):
+        self.style = style
+        self.sep = sep
+        self.default = default
+        self.table = pinyin_table(style, sep)
+        self.trie = surname_trie()
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return self.default
+        surname = self.trie.match(value)
+        if surname is None:
+            return self.default
+        return self.table[surname]
+
+    def batch(self, values):
+        match, table, default = self.trie.match, self.table, self.default
+        out = []
+        for value in values:
+            surname = match(value) if isinstance(value, str) else None
+            out.append(default if surname is None else table[surname])
+        return out
 
 
 class CheckName(object):
-    """检测姓名的有效性"""
+    """检测姓名的有效性，支持复姓，姓氏之后至少还有一个字"""
 
     def __init__(self, default=None):
         self.default = default
+        self.trie = surname_trie()
 
     def __call__(self, value):
         if not isinstance(value, str):
             return self.default
         if '先生' in value or '女士' in value or len(value) < 2:
             return self.default
-        if MagicStr(value)[0] not in BAIJIAXING.keys():
+        surnames = self.trie.prefixes(value)
+        if not surnames or len(surnames[0]) >= len(value):
             return self.default
         return value
 
+    def batch(self, values):
+        return [self(value) for value in values]
+
 
 class CheckSurname(object):
-    """检测姓氏的有效性"""
+    """检测姓氏的有效性，返回最长匹配的姓氏（支持复姓）"""
 
     def __init__(self, default=None):
         self.default = default
+        self.trie = surname_trie()
 
     def __call__(self, value):
         if not isinstance(value, str):
             return self.default
-        surname = MagicStr(value)[0]
-        if surname in BAIJIAXING.keys():
-            return surname
+        surname = self.trie.match(value)
+        if surname is None:
+            return self.default
+        return surname
+
+    def batch(self, values):
+        return [self(value) for value in values]
+
+
+_TIME_PATTERNS = [
+    r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D]s[\D]a[\D*]',
+    r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D]s[\D*]',
+    r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D]a[\D*]',
+    r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D*]',
+    r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]a[\D*]',
+    r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D*]',
+    r'[\D*]YYYY[\D]M[\D]D[\D*]',
+    r'[\D*]YYYY[\D]M[\D*]',
+    r'[\D*]YYYY[\D*]',
+]
+TIME_PATTERNS = []
+for _pat in _TIME_PATTERNS:
+    TIME_PATTERNS.extend([_pat, _pat[2:]])
 
+_SHAPE_TABLE = str.maketrans('0123456789', '9999999999')
+# 年份在最前、之后都是1~2位数字的形状，数字组按顺序对应年月日时分秒
+_RE_CLEAN_SHAPE = re.compile(r'^\D*9999(?:\D+99?){0,5}(?:\D.*)?$', re.S)
+_RE_NINES = re.compile(r'9+')
+_RE_ESCAPED = re.compile(r'\[.*?\]')
+_DIRECT_TOKENS = ('YYYY', 'M', 'D', 'H', 'm', 's')
+_LOCAL_TZ = tz.tzlocal()
+_UTC = tz.tzutc()
+_SHAPES = {}
+_SHAPES_MAXSIZE = 4096
 
-class FormatTime(object):
-    """格式化时间格式"""
 
-    def __init__(self, pattern=None):
+def _direct_time(value, slices):
+    """按形状中数字组的位置直接构造时间，结果与arrow按对应格式解析一致"""
+    nums = [int(value[start:end]) for start, end in slices]
+    nums.extend([1] * (3 - len(nums)))
+    return datetime(*nums, tzinfo=_UTC)
 
-        patterns = [
-            r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D]s[\D]a[\D*]',
-            r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D]s[\D*]',
-            r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D]a[\D*]',
-            r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]m[\D*]',
-            r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D]a[\D*]',
-            r'[\D*]YYYY[\D]M[\D]D[\D+]H[\D*]',
-            r'[\D*]YYYY[\D]M[\D]D[\D*]',
-            r'[\D*]YYYY[\D]M[\D*]',
-            r'[\D*]YYYY[\D*]',
-        ]
-        self.patterns = []
-        for pat in patterns:
-            self.patterns.extend([pat, pat[2:]])
 
+class FormatTime(object):
+    """格式化时间格式
+
+    数字替换成9后的字符串作为输入的"形状"，同一形状由同一个格式解析。
+    首次遇到某个形状时按原顺序试出格式并缓存，之后只用该格式解析，常见形状直接用datetime构造。
+    """
+
+    def __init__(self, pattern=None):
+        self.patterns = list(TIME_PATTERNS)
         if pattern:
             self.patterns.insert(0, pattern)
+            self._shapes = {}
+        else:
+            self._shapes = _SHAPES
 
-    def __call__(self, value):
+    def _slow(self, value):
         try:
             value = arrow.get(value, self.patterns)
         except Exception as e:
             try:
-                return arrow.get(value).to('local').datetime
+                return arrow.get(value).to(_LOCAL_TZ).datetime
             except Exception as e:
                 return None
         else:
             return value.datetime
+
+    def _learn(self, value, shape):
+        """找出第一个正则能匹配的格式（与arrow多格式解析的选择一致），能直接构造时记录数字组个数"""
+        parser = DateTimeParser()
+        index = None
+        for i, fmt in enumerate(self.patterns):
+            try:
+                parser.parse(value, fmt)
+            except ParserMatchError:
+                continue
+            except Exception as e:
+                index = i
+                break
+            else:
+                index = i
+                break
+
+        slices = None
+        if index is not None:
+            # 样本本身无效（如 2021-02-30、0000-00-00）时不缓存，由同形状的下一个值重新推断
+            try:
+                expect = arrow.get(value, self.patterns[index]).datetime
+            except Exception as e:
+                return index, None
+            if _RE_CLEAN_SHAPE.match(shape):
+                tokens = _RE_ESCAPED.sub(' ', self.patterns[index]).split()
+                if tokens == list(_DIRECT_TOKENS[:len(tokens)]):
+                    spans = tuple(m.span() for m in _RE_NINES.finditer(shape))[:len(tokens)]
+                    try:
+                        if expect == _direct_time(value, spans):
+                            slices = spans
+                    except Exception as e:
+                        pass
+
+        rule = (index, slices)
+        if len(self._shapes) < _SHAPES_MAXSIZE:
+            self._shapes[shape] = rule
+        return rule
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return self._slow(value)
+
+        shape = value.translate(_SHAPE_TABLE)
+        rule = self._shapes.get(shape)
+        if rule is None:
+            rule = self._learn(value, shape)
+        index, slices = rule
+        if index is None:
+            try:
+                return arrow.get(value).to(_LOCAL_TZ).datetime
+            except Exception as e:
+                return None
+        try:
+            if slices:
+                return _direct_time(value, slices)
+            return arrow.get(value, self.patterns[index]).datetime
+        except Exception as e:
+            return self._slow(value)
+
+    def batch(self, values):
+        """整列解析，格式在第一个样本上推断，之后同形状的元素直接按数字位置构造，
+        形状不一致或解析失败的元素单独处理，重复值只解析一次
+        """
+        call = self.__call__
+        sample_shape = sample_slices = None
+        seen = {}
+        out = []
+        for value in values:
+            if not isinstance(value, str):
+                out.append(call(value))
+                continue
+            date = seen.get(value)
+            if date is None:
+                shape = value.translate(_SHAPE_TABLE)
+                if sample_shape is None:
+                    sample_shape = shape
+                if shape == sample_shape and sample_slices:
+                    try:
+                        date = _direct_time(value, sample_slices)
+                    except Exception as e:
+                        date = call(value)
+                else:
+                    date = call(value)
+                    # 样本无效时形状规则还没确定，直到同形状的有效值学到规则
+                    if shape == sample_shape:
+                        sample_slices = self._shapes.get(shape, (None, None))[1]
+                if date is not None and len(seen) < 65536:
+                    seen[value] = date
+            out.append(date)
+        return out
+
+    def to_array(self, values, numpy=False):
+        """整列转时间戳（秒）数组，返回(数组, 有效标记)，无效位置为nan
+
+        numpy=True时返回datetime64[us]（UTC）数组，无效位置为NaT
+
+        >>> FormatTime().to_array(['2021-05-03', 'x'])
+        (array('d', [1620000000.0, nan]), bytearray(b'\\x01\\x00'))
+        """
+        nan = float('nan')
+        data = array('d')
+        mask = bytearray()
+        for date in self.batch(values):
+            if date is None:
+                data.append(nan)
+                mask.append(0)
+            else:
+                data.append(date.timestamp())
+                mask.append(1)
+
+        if numpy:
+            import numpy as np
+            stamps = np.frombuffer(data, dtype=np.float64)
+            valid = np.frombuffer(mask, dtype=np.bool_).copy()
+            result = np.full(len(stamps), np.datetime64('NaT'), dtype='datetime64[us]')
+            result[valid] = np.round(stamps[valid] * 1e6).astype(np.int64).astype('datetime64[us]')
+            return result, valid
+        return data, mask
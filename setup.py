@@ -25,6 +25,7 @@ setuptools.setup(
     long_description_content_type='text/markdown',
     url='https://github.com/wlccgp3/my_utils.git',
     packages=setuptools.find_packages(exclude=('tests', 'temp')),
+    package_data={'my_utils': ['data/*.gz']},
     install_requires=install_requires,
     classifiers=[
         'Programming Language :: Python :: 3',
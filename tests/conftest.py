@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# 本地代理接口替身，返回格式同 get_proxy 的接口
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class ProxyAPI(object):
+    """fail=True时返回500和非json内容；设置body时原样返回body；每次成功返回size个不重复的代理"""
+
+    def __init__(self):
+        self.fail = False
+        self.body = None
+        self.size = 3
+        self.delay = 0
+        self.calls = 0
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def response(self):
+        with self._lock:
+            self.calls += 1
+            n = next(self._counter)
+        time.sleep(self.delay)
+        if self.fail:
+            return 500, b'error'
+        if self.body is not None:
+            return 200, self.body
+        data = ['10.{}.{}.{}:{}'.format(n // 65536 % 256, n // 256 % 256, n % 256, 8000 + i) for i in range(self.size)]
+        return 200, json.dumps({'message': 'success', 'data': data}).encode()
+
+
+@pytest.fixture
+def proxy_api():
+    api = ProxyAPI()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            status, body = api.response()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api.url = 'http://127.0.0.1:{}/proxy'.format(server.server_address[1])
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+
+from my_utils.temp import AsyncProxySource, aget_proxy, get_proxy
+
+
+def test_aget_proxy_matches_get_proxy(proxy_api):
+    assert asyncio.run(aget_proxy(proxy_api.url)) == ['10.0.0.0:8000', '10.0.0.0:8001', '10.0.0.0:8002']
+    assert get_proxy(proxy_api.url) == ['10.0.0.1:8000', '10.0.0.1:8001', '10.0.0.1:8002']
+
+
+def test_concurrent_gets_coalesce_into_one_call_per_batch(proxy_api):
+    proxy_api.delay = 0.05
+
+    async def main():
+        source = AsyncProxySource(proxy_api.url, min_size=0)
+        return await asyncio.gather(*(source.get() for _ in range(30)))
+
+    proxies = asyncio.run(main())
+    assert None not in proxies
+    assert len(set(proxies)) == 30
+    assert proxy_api.calls == 10
+
+
+def test_one_call_when_batch_covers_all_waiters(proxy_api):
+    proxy_api.size = 100
+    proxy_api.delay = 0.05
+
+    async def main():
+        source = AsyncProxySource(proxy_api.url, min_size=0)
+        return await asyncio.gather(*(source.get() for _ in range(50)))
+
+    assert len(set(asyncio.run(main()))) == 50
+    assert proxy_api.calls == 1
+
+
+@pytest.mark.parametrize('body', [None, b'[]', b'"ok"'])
+def test_backoff_returns_default(proxy_api, body):
+    proxy_api.fail = body is None
+    proxy_api.body = body
+
+    async def main():
+        source = AsyncProxySource(proxy_api.url, backoff=(0.2, 1))
+        assert await source.get('none') == 'none'
+        start = time.perf_counter()
+        results = await asyncio.gather(*(source.get('none') for _ in range(100)))
+        assert set(results) == {'none'}
+        assert time.perf_counter() - start < 0.1
+        assert proxy_api.calls == 1
+
+        proxy_api.fail = False
+        proxy_api.body = None
+        await asyncio.sleep(0.25)
+        return await source.get()
+
+    assert asyncio.run(main()).startswith('10.')
+    assert proxy_api.calls == 2
+
+
+def test_close_returns_default_to_waiters(proxy_api):
+    proxy_api.delay = 0.3
+
+    async def main():
+        source = AsyncProxySource(proxy_api.url)
+        waiters = [asyncio.ensure_future(source.get('none')) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        source.close()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(main()) == ['none'] * 5
+
+
+def test_reuse_rotates_until_expired(proxy_api):
+    async def main():
+        source = AsyncProxySource(proxy_api.url, min_size=0, reuse=True, ttl=0.1)
+        first = [await source.get() for _ in range(6)]
+        await asyncio.sleep(0.15)
+        return first, await source.get()
+
+    first, later = asyncio.run(main())
+    assert first[:3] == first[3:]
+    assert later not in first
+    assert proxy_api.calls == 2
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import time
+
+from my_utils.temp import ProxyPool
+
+from conftest import wait_until
+
+
+def test_acquire_on_empty_pool_returns_immediately(proxy_api):
+    proxy_api.delay = 0.5
+    with ProxyPool(proxy_api.url, min_size=3) as pool:
+        start = time.perf_counter()
+        assert pool.acquire() is None
+        assert pool.acquire('none') == 'none'
+        assert time.perf_counter() - start < 0.05
+
+
+def test_background_refill(proxy_api):
+    with ProxyPool(proxy_api.url, min_size=6, interval=0.01) as pool:
+        assert wait_until(lambda: len(pool) >= 6)
+        assert proxy_api.calls >= 2
+        assert pool.acquire().startswith('10.')
+
+
+def test_ttl_purge(proxy_api):
+    pool = ProxyPool(proxy_api.url, ttl=0.1, start=False)
+    assert pool.refill() == 3
+    assert len(pool) == 3
+    time.sleep(0.15)
+    assert pool.acquire() is None
+    pool.refill()
+    time.sleep(0.15)
+    pool.purge()
+    assert len(pool) == 0
+    pool.close()
+
+
+def test_evict_after_max_failures(proxy_api):
+    pool = ProxyPool(proxy_api.url, max_failures=2, start=False)
+    pool.refill()
+    proxy = pool.acquire()
+    pool.report(proxy, False)
+    assert len(pool) == 3
+    pool.report(proxy, True, 0.1)
+    pool.report(proxy, False)
+    assert len(pool) == 3
+    pool.report(proxy, False)
+    assert len(pool) == 2
+    assert pool.stats()['evictions'] == 1
+    assert proxy not in pool.stats()['proxies']
+    pool.close()
+
+
+def test_prefers_better_scores(proxy_api):
+    pool = ProxyPool(proxy_api.url, start=False)
+    pool.refill()
+    good, bad = list(pool.stats()['proxies'])[:2]
+    for _ in range(10):
+        pool.report(good, True, 0.05)
+        pool.report(bad, True, 5.0)
+    picks = [pool.acquire() for _ in range(300)]
+    assert picks.count(good) > picks.count(bad)
+    pool.close()
+
+
+def test_backoff_during_outage(proxy_api):
+    proxy_api.fail = True
+    with ProxyPool(proxy_api.url, min_size=3, interval=0.01, backoff=(0.2, 1)) as pool:
+        time.sleep(0.5)
+        # 0s、0.2s、0.6s才请求，不会每个interval都请求
+        assert 1 <= proxy_api.calls <= 3
+        assert pool.stats()['errors'] == proxy_api.calls
+        start = time.perf_counter()
+        assert pool.acquire() is None
+        assert time.perf_counter() - start < 0.05
+
+        proxy_api.fail = False
+        assert wait_until(lambda: len(pool) >= 3)